@@ -1 +1 @@
-default_app_config = 'opd_application.apps.OpdApplicationConfig'
\ No newline at end of file
+default_app_config = 'opd_application.apps.OpdApplicationConfig'
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class OpdApplicationConfig(AppConfig):
     name = 'opd_application'
     verbose_name = 'OPD Application'
+
+    def ready(self):
+        # registers signal receivers that keep derived data up to date: patient phonetic keys and search indexes,
+        # unified search documents, cache versions, cached reference data and medical record counts
+        from opd_application import signals
@@ -0,0 +1,252 @@
+# from python library
+import collections.abc
+import logging
+
+# from third-party applications
+from django.db.models import Case, When, Value
+from django.utils.timezone import localtime, now
+
+# from main application
+from opd_application.constants import BULK_WRITE_BATCH_SIZE
+from opd_application.functions import log_start_time, log_end_time
+from opd_application.models.diagnosis_models import DiagnosisEntry
+from opd_application.models.laboratory_models import LaboratoryResult
+from opd_application.models.physical_exam_models import PhysicalExamKey, PhysicalExamDetail
+from opd_application.models.prescription_models import PrescriptionEntry
+from opd_application.reference_data import get_reference_index
+
+logger = logging.getLogger(__name__)
+
+
+def bulk_create(instances, batch_size=BULK_WRITE_BATCH_SIZE):
+    """
+    Function for inserting new model instances of the same model with as few INSERT statements as possible.
+    :param instances:   list of unsaved model instances
+    :param batch_size:  maximum number of rows inserted by each statement
+    :return:            list of inserted model instances
+    """
+
+    if not instances:
+        return []
+
+    model = type(instances[0])
+    logger.info('Inserting [%s] records of [%s]' % (len(instances), model._meta.label))
+
+    return model.objects.bulk_create(instances, batch_size=batch_size)
+
+
+def bulk_update(instances, field_names, batch_size=BULK_WRITE_BATCH_SIZE):
+    """
+    Function for saving changed fields of model instances of the same model with one UPDATE statement for each batch.
+    Every field is set to a CASE expression choosing the value of each row by primary key. Signals are not sent.
+    :param instances:   list of saved model instances
+    :param field_names: names of fields to be saved
+    :param batch_size:  maximum number of rows updated by each statement
+    :return:            number of updated rows
+    """
+
+    if not instances:
+        return 0
+
+    log_start_time()
+
+    model = type(instances[0])
+    fields = [model._meta.get_field(field_name) for field_name in field_names]
+    updated_count = 0
+
+    logger.info('Updating fields [%s] of [%s] records of [%s]' % (', '.join(field_names), len(instances),
+                                                                  model._meta.label))
+
+    for start in range(0, len(instances), batch_size):
+        batch = instances[start:start + batch_size]
+        values = {}
+
+        for field in fields:
+            values[field.attname] = Case(
+                *[When(pk=instance.pk, then=Value(getattr(instance, field.attname), output_field=field))
+                  for instance in batch], output_field=field)
+
+        updated_count += model.objects.filter(pk__in=[instance.pk for instance in batch]).update(**values)
+
+    log_end_time()
+    return updated_count
+
+
+class EntryWriter(object):
+    """
+    Writes entry records of a parent record (e.g. results of a laboratory record) from a formset with one form for each
+    key record (e.g. laboratory test detail). Current entries of the parent are retrieved with a single query and
+    compared with the forms in memory. Forms without changes are skipped, new entries are inserted with one statement
+    and changed or removed entries are updated with one statement. Entries are removed by setting their deleted field,
+    or by saving their blank values if the model has no deleted field.
+    """
+
+    # entry model, its foreign keys to parent and key records and fields copied from forms
+    entry_model = None
+    parent_field_name = None
+    key_field_name = None
+    value_field_names = []
+
+    # soft delete flag of entry model, None if entries cannot be removed
+    deleted_field_name = None
+
+    def is_filled(self, form):
+        """
+        Checks if a form holds an entry to be kept, by default if its first value field is not blank.
+        :param form:    valid form of formset
+        :return:        True if entry is kept, False if it is removed or skipped
+        """
+
+        return bool(getattr(form.instance, self.value_field_names[0]))
+
+    def get_current_entries(self, parent):
+        """
+        Retrieves current entries of a parent record, keyed by id of key record. Latest entry is kept for a key record
+        with more than one entry.
+        :param parent:  parent model instance
+        :return:        dictionary of key record id to entry model instance
+        """
+
+        if parent.id is None:
+            return {}
+
+        query_set = self.entry_model.objects.filter(**{self.parent_field_name: parent})
+
+        if self.deleted_field_name:
+            query_set = query_set.filter(**{self.deleted_field_name: False})
+
+        key_attname = self.entry_model._meta.get_field(self.key_field_name).attname
+
+        return {getattr(entry, key_attname): entry for entry in query_set.order_by('id')}
+
+    def save(self, parent, formset, user):
+        """
+        Writes new, changed and removed entries of a parent record. A new parent record is saved before new entries
+        are inserted, an existing parent record is left untouched.
+        :param parent:  parent model instance, unsaved for a new parent record
+        :param formset: valid formset
+        :param user:    user recording the entries
+        :return:        None
+        """
+
+        log_start_time()
+
+        logger.info('Retrieving current [%s] records' % self.entry_model._meta.label)
+        current_entries = self.get_current_entries(parent)
+        key_attname = self.entry_model._meta.get_field(self.key_field_name).attname
+        value_attnames = [self.entry_model._meta.get_field(field_name).attname
+                          for field_name in self.value_field_names]
+        new_entries = []
+        changed_entries = []
+        updated_date = localtime(now())
+
+        for form in formset:
+            key_id = getattr(form.instance, key_attname)
+            entry = current_entries.get(key_id)
+
+            if entry:
+                if self.is_filled(form) or not self.deleted_field_name:
+                    changed_attnames = [attname for attname in value_attnames
+                                        if getattr(entry, attname) != getattr(form.instance, attname)]
+
+                    if not changed_attnames:
+                        logger.info('No change was detected for [%s]' % key_id)
+                        continue
+
+                    logger.info('Updating [%s] of entry for [%s]' % (', '.join(changed_attnames), key_id))
+                    for attname in changed_attnames:
+                        setattr(entry, attname, getattr(form.instance, attname))
+                else:
+                    logger.info('Removing entry for [%s]' % key_id)
+                    setattr(entry, self.deleted_field_name, True)
+
+                changed_entries.append(entry)
+            elif self.is_filled(form):
+                logger.info('Creating new entry for [%s]' % key_id)
+                entry = form.save(commit=False)
+                new_entries.append(entry)
+            else:
+                logger.info('Skipping entry for [%s]' % key_id)
+                continue
+
+            entry.updated_by = user
+            entry.updated_date = updated_date
+
+        if new_entries and parent.id is None:
+            logger.info('Saving new parent record of [%s] new entries' % len(new_entries))
+            parent.save()
+
+        for entry in new_entries:
+            setattr(entry, self.parent_field_name, parent)
+
+        update_field_names = self.value_field_names + ['updated_by', 'updated_date']
+        if self.deleted_field_name:
+            update_field_names.append(self.deleted_field_name)
+
+        bulk_create(new_entries)
+        bulk_update(changed_entries, update_field_names)
+
+        log_end_time()
+
+
+class LaboratoryResultWriter(EntryWriter):
+    entry_model = LaboratoryResult
+    parent_field_name = 'laboratory'
+    key_field_name = 'laboratory_test_detail'
+    value_field_names = ['value']
+    deleted_field_name = 'is_deleted'
+
+
+class PrescriptionEntryWriter(EntryWriter):
+    entry_model = PrescriptionEntry
+    parent_field_name = 'prescription'
+    key_field_name = 'medicine'
+    value_field_names = ['dosage', 'package', 'frequency', 'designated_time']
+    deleted_field_name = 'is_deleted'
+
+    def is_filled(self, form):
+        return bool(form.cleaned_data.get('prescribe'))
+
+
+class DiagnosisEntryWriter(EntryWriter):
+    entry_model = DiagnosisEntry
+    parent_field_name = 'diagnosis'
+    key_field_name = 'diagnosis_category'
+    value_field_names = ['value', 'remark']
+
+
+def create_physical_exam_details(physical_exam, form):
+    """
+    Function for saving values of a physical exam form as physical exam details. Form fields are matched with physical
+    exam keys by their case-folded key value, taken from the reference data cache. Every selected option of a multiple
+    choice field becomes a detail of its own, and all details are inserted with one statement.
+    :param physical_exam:   saved PhysicalExam model instance
+    :param form:            valid PhysicalExamForm
+    :return:                list of inserted PhysicalExamDetail model instances
+    """
+
+    log_start_time()
+
+    keys = get_reference_index(PhysicalExamKey, 'key_value')
+    physical_exam_details = []
+
+    for field_name in form.fields:
+        key = keys.get(field_name.casefold())
+        values = form.cleaned_data.get(field_name)
+
+        if not key or not values:
+            continue
+
+        # multiple choice fields hold a list of selected options
+        if not isinstance(values, collections.abc.Iterable) or isinstance(values, str):
+            values = [values]
+
+        for value in values:
+            real_value = value if isinstance(value, (str, bool)) else value.id
+            physical_exam_details.append(PhysicalExamDetail(physical_exam=physical_exam, key=key,
+                                                            real_value=real_value, str_value=value))
+
+    physical_exam_details = bulk_create(physical_exam_details)
+
+    log_end_time()
+    return physical_exam_details
@@ -0,0 +1,175 @@
+# from python library
+import collections
+import hashlib
+import logging
+import threading
+
+# from third-party applications
+from django.core.cache import cache
+from django.db.models import F
+
+# from main application
+from opd_application.constants import MAX_CACHED_SEARCH_RESULTS, SEARCH_RESULT_CACHE_TIMEOUT
+from opd_application.functions import log_start_time, log_end_time
+from opd_application.models.models import CacheVersion
+
+logger = logging.getLogger(__name__)
+
+SEARCH_RESULT_CACHE_KEY = 'opd:search_results:%s:%s:%s:%s'
+SEARCH_RESULT_VERSION_NAME = 'search_results:%s'
+
+# stored instead of an id list when a search has more results than can be cached
+TOO_MANY_RESULTS = 'too_many'
+
+
+class LRUCache(object):
+    """
+    Bounded in-process cache that discards the least recently used entry once it is full. Entries are not shared
+    between processes, so keys should contain a version from get_cache_version() to notice writes made elsewhere.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.entries:
+                return default
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class CachedResultList(object):
+    """
+    Ordered list of search results backed by a list of ids. Slicing only slices the ids, so a Paginator can take the
+    current page without touching the database. Records are retrieved from the given QuerySet when the list is
+    iterated.
+    """
+
+    ordered = True
+
+    def __init__(self, query_set, ids):
+        self.query_set = query_set
+        self.model = query_set.model
+        self.ids = ids
+        self.records = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def count(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CachedResultList(self.query_set, self.ids[index])
+
+        return list(self)[index]
+
+    def __iter__(self):
+        if self.records is None:
+            logger.info('Retrieving [%s] records of [%s]' % (len(self.ids), self.model._meta.label))
+            records = self.query_set.in_bulk(self.ids) if self.ids else {}
+            self.records = [records[record_id] for record_id in self.ids if record_id in records]
+
+        return iter(self.records)
+
+
+def get_cache_version(name):
+    """
+    Function for retrieving the current version of a group of cached values. Versions are kept in the database so that
+    every process sees writes made by the others.
+    :param name:    name of group of cached values
+    :return:        version number
+    """
+
+    version = CacheVersion.objects.filter(name=name).values_list('version', flat=True).first()
+
+    if version is None:
+        version = CacheVersion.objects.get_or_create(name=name)[0].version
+
+    return version
+
+
+def bump_cache_version(name):
+    """
+    Function for invalidating a group of cached values by moving to a new version. The version is incremented by the
+    database in a single UPDATE, so concurrent moves are not lost.
+    :param name:    name of group of cached values
+    :return:        None
+    """
+
+    if not CacheVersion.objects.filter(name=name).update(version=F('version') + 1):
+        logger.info('No version found for [%s], starting a new version' % name)
+        CacheVersion.objects.get_or_create(name=name)
+        CacheVersion.objects.filter(name=name).update(version=F('version') + 1)
+
+    logger.info('Moved cached values of [%s] to a new version' % name)
+
+
+def get_search_result_version_name(model):
+    """
+    Function for retrieving the cache version name of search results of a model.
+    :param model:   model class
+    :return:        cache version name
+    """
+
+    return SEARCH_RESULT_VERSION_NAME % model._meta.label_lower
+
+
+def cache_search_results(query_set, search_type, search_param, record_query_set=None):
+    """
+    Function for retrieving search results from an ordered id list kept in the cache. Cache keys contain the shared
+    search result version of the model, so ids are taken from the QuerySet again when the search has not been cached
+    yet or records of the model were saved or deleted since, by this process or any other.
+    :param query_set:           ordered QuerySet of search results
+    :param search_type:         search type
+    :param search_param:        search parameter
+    :param record_query_set:    QuerySet used for retrieving records of the displayed page, all fields if not given
+    :return:                    CachedResultList instance, or the QuerySet itself if it has too many results to be
+                                cached
+    """
+
+    log_start_time()
+
+    model = query_set.model
+    normalised_param = ' '.join(str(search_param).split()).lower()
+    cache_key = SEARCH_RESULT_CACHE_KEY % (model._meta.label_lower,
+                                           get_cache_version(get_search_result_version_name(model)), search_type,
+                                           hashlib.md5(normalised_param.encode('utf-8')).hexdigest())
+    ids = cache.get(cache_key)
+
+    if ids is None:
+        logger.info('Caching search results of [%s] for [%s]' % (model._meta.label, normalised_param))
+        ids = list(query_set.values_list('id', flat=True)[:MAX_CACHED_SEARCH_RESULTS + 1])
+
+        if len(ids) > MAX_CACHED_SEARCH_RESULTS:
+            ids = TOO_MANY_RESULTS
+
+        cache.set(cache_key, ids, SEARCH_RESULT_CACHE_TIMEOUT)
+    else:
+        logger.info('Using cached search results of [%s] for [%s]' % (model._meta.label, normalised_param))
+
+    log_end_time()
+
+    if ids == TOO_MANY_RESULTS:
+        logger.info('Search has too many results to be cached')
+        return query_set
+
+    return CachedResultList(record_query_set if record_query_set is not None else model.objects.all(), ids)
@@ -3,6 +3,7 @@ from django.core.urlresolvers import reverse_lazy
 # String Constants
 DEFAULT_SEARCH_CATEGORY = '1'
 DEFAULT_SEARCH_TYPE = '1'
+DATE_SEARCH_TYPE = '3'
 
 LOGIN_PAGE_NAME = 'auth:login'
 
@@ -16,6 +17,7 @@ PATIENT_SEARCH_LIST_TEMPLATE = 'patient_list.html'
 PATIENT_FORM_PAGE_NAME = 'opd:record_patient'
 PATIENT_PROFILE_PAGE_NAME = 'opd:profile'
 PATIENT_SEARCH_LIST_PAGE_NAME = 'opd:search_patient'
+PATIENT_AUTOCOMPLETE_PAGE_NAME = 'opd:autocomplete_patient'
 
 MEDICAL_RECORD_PAGE_ICON = 'fa-list-alt'
 MEDICAL_RECORD_FORM_TEMPLATE = 'medical_record_form.html'
@@ -77,6 +79,7 @@ PRESCRIPTION_EDIT_PAGE_NAME = 'opd:edit_prescription'
 PRESCRIPTION_PROFILE_PAGE_NAME = 'opd:prescription'
 PRESCRIPTION_SEARCH_PAGE_NAME = 'opd:search_prescription'
 PRESCRIPTION_SEARCH_LIST_TEMPLATE = 'prescription_search_list.html'
+MEDICINE_AUTOCOMPLETE_PAGE_NAME = 'opd:autocomplete_medicine'
 
 MEDICATION_FORM_TEMPLATE = 'medication_form.html'
 MEDICATION_PAGE_ICON = 'fa-medkit'
@@ -85,6 +88,22 @@ MEDICATION_EDIT_PAGE_NAME = 'opd:edit_medication'
 MEDICATION_PROFILE_PAGE_NAME = 'opd:medication'
 MEDICATION_FORM_PAGE_NAME = 'opd:record_medication'
 
+UNIFIED_SEARCH_PAGE_ICON = 'fa-search'
+UNIFIED_SEARCH_TEMPLATE = 'unified_search_list.html'
+UNIFIED_SEARCH_PAGE_NAME = 'opd:search_all'
+
+FORMSET_TEMPLATE = 'formset.html'
+
+PAGINATION_MODE_OFFSET = 'offset'
+PAGINATION_MODE_KEYSET = 'keyset'
+
+COUNT_STRATEGY_EXACT = 'exact'
+COUNT_STRATEGY_CAPPED = 'capped'
+COUNT_STRATEGY_ESTIMATE = 'estimate'
+
+PATIENT_CACHE_VERSION_NAME = 'patient'
+REFERENCE_DATA_VERSION_NAME = 'reference_data'
+
 # Numeric Constants
 LIST_OFFSET = 1
 
@@ -94,6 +113,35 @@ MAX_LIST_ITEMS_PER_PAGE = 1
 
 MIN_AGE_REQUIREMENT = 18
 
+SEARCH_TOKEN_LENGTH = 3
+
+PHONETIC_KEY_LENGTH = 8
+
+AUTOCOMPLETE_MIN_LENGTH = 2
+
+AUTOCOMPLETE_MAX_RESULTS = 10
+
+AUTOCOMPLETE_CACHE_SIZE = 512
+
+MAX_CACHED_SEARCH_RESULTS = 1000
+
+UNIFIED_SEARCH_MAX_RESULTS = 100
+
+# in seconds
+SEARCH_RESULT_CACHE_TIMEOUT = 600
+
+MAX_EXACT_SEARCH_COUNT = 1000
+
+# in seconds
+ESTIMATED_COUNT_TIMEOUT = 300
+
+# in seconds
+REFERENCE_DATA_CHECK_INTERVAL = 5
+
+BULK_WRITE_BATCH_SIZE = 100
+
+BLANK_FORMSET_CACHE_SIZE = 16
+
 # Collection Constants
 GENERAL_SEARCH_TYPE_LABEL = {
     '1': 'by Patient Last Name',
@@ -105,6 +153,7 @@ PATIENT_SEARCH_TYPE_LABEL = {
     '1': 'by Last Name',
     '2': 'by First Name',
     '3': 'by Birth Date',
+    '4': 'by Name Sound',
 }
 
 SEARCH_VIEW_LINKS = {
@@ -114,10 +163,18 @@ SEARCH_VIEW_LINKS = {
     '4': reverse_lazy('opd:search_laboratory'),
     '5': reverse_lazy('opd:search_diagnosis'),
     '6': reverse_lazy('opd:search_prescription'),
+    '7': reverse_lazy('opd:search_all'),
 }
 
 PAGE_ICONS = [PATIENT_PAGE_ICON, MEDICAL_RECORD_PAGE_ICON, PHYSICAL_EXAM_PAGE_ICON, LABORATORY_PAGE_ICON,
-              DIAGNOSIS_PAGE_ICON, PRESCRIPTION_PAGE_ICON]
-PAGE_LABELS = ['Patients', 'Medical Records', 'Physical Exams', 'Laboratory Results', 'Diagnoses', 'Prescriptions']
+              DIAGNOSIS_PAGE_ICON, PRESCRIPTION_PAGE_ICON, UNIFIED_SEARCH_PAGE_ICON]
+PAGE_LABELS = ['Patients', 'Medical Records', 'Physical Exams', 'Laboratory Results', 'Diagnoses', 'Prescriptions',
+               'All Records']
+
+VALID_SEARCH_TYPES = ['1', '2', '3', '4']
 
-VALID_SEARCH_TYPES = ['1', '2', '3']
+# formats accepted by date searches, tried in order from the most to the least specific period
+DAY_SEARCH_FORMATS = ['%Y-%m-%d', '%m/%d/%Y', '%b %d %Y', '%B %d %Y', '%d %b %Y', '%d %B %Y']
+MONTH_SEARCH_FORMATS = ['%Y-%m', '%m/%Y', '%b %Y', '%B %Y']
+YEAR_SEARCH_FORMATS = ['%Y']
+DATE_RANGE_SEPARATORS = [' to ', ' - ', '..']
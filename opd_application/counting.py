@@ -0,0 +1,148 @@
+# from python library
+import logging
+
+# from third-party applications
+from django.core.cache import cache
+from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.db import connections
+from django.utils.functional import cached_property
+
+# from main application
+from opd_application.constants import COUNT_STRATEGY_CAPPED, COUNT_STRATEGY_ESTIMATE, MAX_EXACT_SEARCH_COUNT, \
+    ESTIMATED_COUNT_TIMEOUT
+from opd_application.functions import log_start_time, log_end_time
+
+logger = logging.getLogger(__name__)
+
+ESTIMATED_COUNT_CACHE_KEY = 'opd:estimated_count:%s'
+
+
+class CountedPaginator(Paginator):
+    """
+    Paginator that uses an already computed number of results instead of running its own COUNT(*) query.
+    """
+
+    def __init__(self, object_list, per_page, known_count, **kwargs):
+        super(CountedPaginator, self).__init__(object_list, per_page, **kwargs)
+        self.known_count = known_count
+
+    @cached_property
+    def count(self):
+        return self.known_count
+
+
+class UncountedPaginator(Paginator):
+    """
+    Paginator for results whose total is not known, e.g. searches with more results than are counted. Each page
+    retrieves one extra row to tell whether a next page exists instead of running a COUNT(*) query, so only pages up to
+    the one after the retrieved page are known.
+    """
+
+    def __init__(self, object_list, per_page, **kwargs):
+        super(UncountedPaginator, self).__init__(object_list, per_page, **kwargs)
+        self.known_count = 0
+
+    @property
+    def count(self):
+        return self.known_count
+
+    @property
+    def num_pages(self):
+        return max(1, (self.known_count + self.per_page - 1) // self.per_page)
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        records = list(self.object_list[bottom:bottom + self.per_page + 1])
+
+        if not records and number > 1:
+            raise EmptyPage('That page contains no results')
+
+        self.known_count = bottom + len(records)
+
+        return self._get_page(records[:self.per_page], number, self)
+
+
+def estimate_table_rows(model):
+    """
+    Function for retrieving the number of rows of a model's table from database statistics. Only supported for MySQL,
+    where statistics can be read without scanning the table.
+    :param model:   model class
+    :return:        estimated number of rows, None if not supported by database
+    """
+
+    connection = connections[model.objects.db]
+
+    if connection.vendor != 'mysql':
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() '
+                       'AND TABLE_NAME = %s', [model._meta.db_table])
+        row = cursor.fetchone()
+
+    return int(row[0]) if row and row[0] is not None else None
+
+
+def count_results(query_set, strategy):
+    """
+    Function for counting results of a QuerySet using a counting strategy.
+    [exact]     runs COUNT(*) on the whole QuerySet
+    [capped]    stops counting after MAX_EXACT_SEARCH_COUNT rows
+    [estimate]  uses database statistics or a cached count, meant for unfiltered listings of a whole table
+    :param query_set:   QuerySet to be counted
+    :param strategy:    counting strategy
+    :return:            number of results and label for displaying it
+    """
+
+    log_start_time()
+
+    if strategy == COUNT_STRATEGY_CAPPED:
+        logger.info('Counting results up to [%s]' % MAX_EXACT_SEARCH_COUNT)
+        count = query_set[:MAX_EXACT_SEARCH_COUNT + 1].count()
+        label = '%s+' % MAX_EXACT_SEARCH_COUNT if count > MAX_EXACT_SEARCH_COUNT else str(count)
+    elif strategy == COUNT_STRATEGY_ESTIMATE:
+        cache_key = ESTIMATED_COUNT_CACHE_KEY % query_set.model._meta.label_lower
+        count = cache.get(cache_key)
+
+        if count is None:
+            logger.info('No cached estimate found for [%s]' % query_set.model._meta.label)
+            count = estimate_table_rows(query_set.model)
+            if count is None:
+                count = query_set.count()
+            cache.set(cache_key, count, ESTIMATED_COUNT_TIMEOUT)
+
+        label = 'About %s' % count
+    else:
+        logger.info('Counting all results')
+        count = query_set.count()
+        label = str(count)
+
+    log_end_time()
+    return count, label
+
+
+def is_exact_count(count, strategy):
+    """
+    Function for checking if a number of results returned by count_results() is the real total, which a paginator can
+    use for numbering pages. Capped counts above MAX_EXACT_SEARCH_COUNT and estimates are only fit for display.
+    :param count:       number of results
+    :param strategy:    counting strategy used
+    :return:            True if count is the real total
+    """
+
+    if strategy == COUNT_STRATEGY_CAPPED:
+        return count <= MAX_EXACT_SEARCH_COUNT
+
+    return strategy != COUNT_STRATEGY_ESTIMATE
@@ -0,0 +1,115 @@
+# from python library
+import calendar
+import datetime
+import logging
+
+# from third-party applications
+from django.utils import timezone
+
+# from main application
+from opd_application.constants import DAY_SEARCH_FORMATS, MONTH_SEARCH_FORMATS, YEAR_SEARCH_FORMATS, \
+    DATE_RANGE_SEPARATORS
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidDateSearch(Exception):
+    """
+    Raised when a search parameter cannot be read as a date, month, year or a range of these.
+    """
+    pass
+
+
+def parse_date_period(value):
+    """
+    Function for converting a date, month or year into the first and last day it covers.
+    :param value:   date text e.g. [2016-03-25], [03/2016], [March 2016], [2016]
+    :raises:        InvalidDateSearch
+    :return:        first and last date of period
+    """
+
+    value = ' '.join(value.replace(',', ' ').split())
+
+    for date_format in DAY_SEARCH_FORMATS:
+        try:
+            start_date = datetime.datetime.strptime(value, date_format).date()
+            return start_date, start_date
+        except ValueError:
+            pass
+
+    for date_format in MONTH_SEARCH_FORMATS:
+        try:
+            start_date = datetime.datetime.strptime(value, date_format).date()
+            last_day = calendar.monthrange(start_date.year, start_date.month)[1]
+            return start_date, start_date.replace(day=last_day)
+        except ValueError:
+            pass
+
+    for date_format in YEAR_SEARCH_FORMATS:
+        try:
+            start_date = datetime.datetime.strptime(value, date_format).date()
+            return start_date, start_date.replace(month=12, day=31)
+        except ValueError:
+            pass
+
+    logger.warn('Cannot read [%s] as a date' % value)
+    raise InvalidDateSearch(value)
+
+
+def parse_date_search(search_param):
+    """
+    Function for converting a search parameter into a range of dates. Accepts a single date, month or year, or two of
+    these joined by a range separator e.g. [2016-03-01 to 2016-03-15], [Jan 2016 - Mar 2016].
+    :param search_param:    search parameter
+    :raises:                InvalidDateSearch
+    :return:                first and last date of searched range
+    """
+
+    search_param = search_param.strip()
+
+    for separator in DATE_RANGE_SEPARATORS:
+        if separator in search_param:
+            start_value, end_value = search_param.split(separator, 1)
+            start_date = parse_date_period(start_value)[0]
+            end_date = parse_date_period(end_value)[1]
+
+            if start_date > end_date:
+                logger.warn('Start of date range [%s] is after end of date range [%s]' % (start_date, end_date))
+                raise InvalidDateSearch(search_param)
+
+            return start_date, end_date
+
+    return parse_date_period(search_param)
+
+
+def create_datetime_range(start_date, end_date):
+    """
+    Function for converting a range of dates into aware datetimes covering whole days in the clinic's time zone.
+    :param start_date:  first date of range
+    :param end_date:    last date of range
+    :return:            start and end datetime, usable for a [__range] lookup
+    """
+
+    clinic_timezone = timezone.get_default_timezone()
+
+    return (timezone.make_aware(datetime.datetime.combine(start_date, datetime.time.min), clinic_timezone),
+            timezone.make_aware(datetime.datetime.combine(end_date, datetime.time.max), clinic_timezone))
+
+
+def filter_by_date(query_set, field_name, search_param):
+    """
+    Function for filtering records whose date field falls within the dates given by the search parameter.
+    :param query_set:       QuerySet to be filtered
+    :param field_name:      DateField or DateTimeField to be searched
+    :param search_param:    search parameter
+    :raises:                InvalidDateSearch
+    :return:                filtered QuerySet
+    """
+
+    start_date, end_date = parse_date_search(search_param)
+    logger.info('Searching [%s] from [%s] to [%s]' % (field_name, start_date, end_date))
+
+    if query_set.model._meta.get_field(field_name).get_internal_type() == 'DateTimeField':
+        return query_set.filter(**{'%s__range' % field_name: create_datetime_range(start_date, end_date)})
+
+    return query_set.filter(**{'%s__range' % field_name: (start_date, end_date)})
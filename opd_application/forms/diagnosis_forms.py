@@ -4,9 +4,10 @@ import logging
 # form third-party applications
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout
-from django.forms import ModelForm, HiddenInput, Select, Textarea
+from django.forms import HiddenInput, Select, Textarea
 
 # from main application
+from opd_application.forms.general_forms import ReferenceChoiceFormSet, ReferenceModelChoiceField, ReferenceModelForm
 from opd_application.models.diagnosis_models import DiagnosisCategoryChoice, DiagnosisEntry, DiagnosisCategory
 from opd_application.widgets import NonInputWidget
 from opd_application.functions import log_start_time, log_end_time
@@ -14,7 +15,7 @@ from opd_application.functions import log_start_time, log_end_time
 logger = logging.getLogger(__name__)
 
 
-class DiagnosisEntryForm(ModelForm):
+class DiagnosisEntryForm(ReferenceModelForm):
     """
     Form for creating a new diagnosis entry record for a specific diagnosis record
     """
@@ -29,57 +30,46 @@ class DiagnosisEntryForm(ModelForm):
         widgets = {
             'diagnosis_category': HiddenInput(),
         }
+        field_classes = {
+            'diagnosis_category': ReferenceModelChoiceField,
+        }
 
     def __init__(self, *args, **kwargs):
         """
-        Retrieves initial data for diagnosis category choices during form creation. However, data is retrieved from
-        [data] instead of [initial] in kwargs after performing form validation
+        Creates dropdown for value field using choices of the diagnosis category displayed by this form. Category and
+        choices are handed over by BaseDiagnosisEntryFormSet, from initial data during form creation or from [data]
+        after performing form validation
         :param args:    variable arguments
-        :param kwargs:  named arguments
+        :param kwargs:  named arguments, [row_record] is the diagnosis category and [choices] its choices
         """
 
+        diagnosis_category = kwargs.pop('row_record', None)
+        choice_list = kwargs.pop('choices', None)
+
         super(DiagnosisEntryForm, self).__init__(*args, **kwargs)
 
         log_start_time()
 
-        choice_list = None
-
         logger.info('Setting default label and widget for value and remark fields')
         self.fields['value'].label = ''
         self.fields['remark'].label = ''
         self.fields['value'].widget = NonInputWidget()
         self.fields['remark'].widget = NonInputWidget()
 
-        logger.info('Retrieving diagnosis category')
-        if kwargs.get('data'):
-            logger.info('Performing initial form creation')
-            diagnosis_category = DiagnosisCategory.objects.get(
-                pk=kwargs.get('data')['%s-diagnosis_category' % kwargs.get('prefix')])
-        elif kwargs.get('initial'):
-            logger.info('Performed form validation')
-            diagnosis_category = kwargs.get('initial')['diagnosis_category']
-        else:
-            logger.warn('Did not receive value for required diagnosis_category parameter')
-            diagnosis_category = None
-
         if diagnosis_category:
             logger.info('Setting label for value field using [%s]' % diagnosis_category)
             self.fields['value'].label = diagnosis_category
 
             logger.info('Instantiating form helper for [%s]' % diagnosis_category)
             self.helper = DiagnosisCategoryFormHelper(diagnosis_category)
-
-            logger.info('Retrieving choices from database for [%s]' % diagnosis_category)
-            choice_list = DiagnosisCategoryChoice.objects.filter(
-                diagnosis_category=diagnosis_category).order_by('order')
         else:
-            logger.warn('diagnosis_category is none or empty')
+            logger.warn('Did not receive value for required diagnosis_category parameter')
 
         if choice_list:
             logger.info(
                 'Creating dropdown widget for value field using retrieved choices for [%s]' % diagnosis_category)
-            self.fields['value'].widget = Select(choices=list(choice_list.values_list('description',
-                                                                                      'description')))
+            self.fields['value'].widget = Select(choices=[(choice.description, choice.description)
+                                                          for choice in choice_list])
 
             logger.info('Checking if list for [%s] contains a general term' % diagnosis_category)
             for choice in choice_list:
@@ -95,6 +85,19 @@ class DiagnosisEntryForm(ModelForm):
         log_end_time()
 
 
+class BaseDiagnosisEntryFormSet(ReferenceChoiceFormSet):
+    """
+    Formset of DiagnosisEntryForm, one form for each diagnosis category. Choices of all categories are retrieved at
+    once.
+    """
+
+    row_model = DiagnosisCategory
+    row_field_name = 'diagnosis_category'
+    choice_model = DiagnosisCategoryChoice
+    choice_row_field_name = 'diagnosis_category'
+    choice_ordering = ('order',)
+
+
 class DiagnosisCategoryFormHelper(FormHelper):
     """
     Form helper for DiagnosisEntryForm. This helper will be instantiated upon receiving initial or validated values from
@@ -1,15 +1,22 @@
 # form python library
 import logging
+import threading
 
 # from third-party applications
 from crispy_forms.bootstrap import Div, InlineField
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Submit, HTML
-from django.forms import Form, CharField, HiddenInput, ValidationError
+from django.forms import Form, CharField, HiddenInput, ValidationError, BaseFormSet, ModelChoiceField, ModelForm, \
+    formset_factory
+from django.template.loader import render_to_string
 
 # from main application
-from opd_application.constants import VALID_SEARCH_TYPES, DEFAULT_SEARCH_TYPE
+from opd_application.caches import LRUCache
+from opd_application.constants import VALID_SEARCH_TYPES, DEFAULT_SEARCH_TYPE, FORMSET_TEMPLATE, \
+    BLANK_FORMSET_CACHE_SIZE
 from opd_application.messages import INVALID_SEARCH_TYPE
+from opd_application.reference_data import get_reference_record, get_reference_groups, reference_data, \
+    get_reference_data_version
 
 logger = logging.getLogger(__name__)
 
@@ -78,3 +85,177 @@ class GeneralSearchForm(Form):
         else:
             logger.info('Valid search_type value passed.')
             return search_type
+
+
+class ReferenceModelChoiceField(ModelChoiceField):
+    """
+    Model choice field for reference records. Received ids are looked up in the reference data cache instead of
+    running a query for every form.
+    """
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+
+        try:
+            record = get_reference_record(self.queryset.model, value)
+        except (TypeError, ValueError):
+            record = None
+
+        if record is None:
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+
+        return record
+
+
+class ReferenceModelForm(ModelForm):
+    """
+    Model form whose ReferenceModelChoiceField fields are only checked against the reference data cache. The model's
+    own check, one query for every foreign key of every form, is skipped.
+    """
+
+    def _get_validation_exclusions(self):
+        exclude = super(ReferenceModelForm, self)._get_validation_exclusions()
+        exclude.extend(field_name for field_name, field in self.fields.items()
+                       if isinstance(field, ReferenceModelChoiceField))
+
+        return exclude
+
+
+class ReferenceChoiceFormSet(BaseFormSet):
+    """
+    Formset whose forms each display one reference record (row) with a dropdown of choices belonging to that record,
+    e.g. a diagnosis category and its choices. Choices of all rows are retrieved at once, grouped by row, and every form
+    receives its row and its own slice of choices through the [row_record] and [choices] keyword arguments.
+    """
+
+    # reference model displayed by each form and name of form field holding its id
+    row_model = None
+    row_field_name = None
+
+    # reference model of choices, foreign key to row model and ordering of choices within a row
+    choice_model = None
+    choice_row_field_name = None
+    choice_ordering = ()
+
+    def __init__(self, *args, **kwargs):
+        super(ReferenceChoiceFormSet, self).__init__(*args, **kwargs)
+
+        logger.info('Retrieving [%s] choices of all forms' % self.choice_model._meta.label)
+        self.choices_per_row = get_reference_groups(self.choice_model, self.choice_row_field_name,
+                                                    *self.choice_ordering)
+
+    def get_row_id(self, index):
+        """
+        Retrieves id of the row displayed by a form from submitted data, or from initial data before submission.
+        :param index:   form index, None for the empty form
+        :return:        row id, None if not available
+        """
+
+        if index is None:
+            return None
+
+        if self.is_bound:
+            return self.data.get('%s-%s' % (self.add_prefix(index), self.row_field_name))
+
+        if self.initial and index < len(self.initial):
+            row = self.initial[index].get(self.row_field_name)
+            return getattr(row, 'id', row)
+
+        return None
+
+    def get_form_kwargs(self, index):
+        kwargs = super(ReferenceChoiceFormSet, self).get_form_kwargs(index)
+        row_id = self.get_row_id(index)
+
+        try:
+            row_record = get_reference_record(self.row_model, row_id) if row_id else None
+        except (TypeError, ValueError):
+            logger.warn('Received invalid [%s] id [%s]' % (self.row_model._meta.label, row_id))
+            row_record = None
+
+        kwargs['row_record'] = row_record
+        kwargs['choices'] = self.choices_per_row.get(row_record.id, []) if row_record else []
+
+        return kwargs
+
+
+class FormSetRegistry(object):
+    """
+    Formset classes whose maximum number of forms is the number of rows of a reference model. Classes are created on
+    first use instead of at import, and created again once the reference data cache has retrieved the model's table
+    again after a change.
+    """
+
+    def __init__(self):
+        self.formsets = {}
+        self.lock = threading.Lock()
+
+    def get_formset(self, form_class, formset, row_model):
+        """
+        Retrieves formset class with one form for each row of a reference model.
+        :param form_class:  form class of formset
+        :param formset:     base formset class
+        :param row_model:   reference model, its number of rows is used as max_num
+        :return:            formset class
+        """
+
+        key = (form_class, formset, row_model)
+        table = reference_data.get_table(row_model)
+
+        with self.lock:
+            created_table, formset_class = self.formsets.get(key, (None, None))
+
+            if created_table is not table:
+                logger.info('Creating formset of [%s] for [%s] rows of [%s]' % (
+                    form_class.__name__, len(table.records), row_model._meta.label))
+                formset_class = formset_factory(form_class, formset=formset, max_num=len(table.records))
+                self.formsets[key] = (table, formset_class)
+
+        return formset_class
+
+
+formset_registry = FormSetRegistry()
+
+
+class RegisteredFormSet(object):
+    """
+    Class attribute of a view that returns the current formset class from formset_registry when accessed.
+    :param form_class:  form class of formset
+    :param row_model:   reference model, its number of rows is used as max_num
+    :param formset:     base formset class
+    """
+
+    def __init__(self, form_class, row_model, formset=BaseFormSet):
+        self.form_class = form_class
+        self.row_model = row_model
+        self.formset = formset
+
+    def __get__(self, instance, owner):
+        return formset_registry.get_formset(self.form_class, self.formset, self.row_model)
+
+
+blank_formsets = LRUCache(BLANK_FORMSET_CACHE_SIZE)
+
+
+def render_blank_formset(name, create_formset):
+    """
+    Function for rendering the formset of a new record. A blank formset only depends on reference data, so its HTML is
+    rendered once for each reference data version and reused for every patient. The version is shared by every process,
+    so reference data changed through any process stops cached HTML from being used within
+    REFERENCE_DATA_CHECK_INTERVAL seconds. Values of the request, such as the CSRF token and the medical record id, are
+    rendered by the page template around the cached HTML.
+    :param name:            name of blank formset, e.g. template name of its page
+    :param create_formset:  function creating the formset, only called if its HTML is not cached yet
+    :return:                formset HTML
+    """
+
+    key = (name, get_reference_data_version())
+    formset_html = blank_formsets.get(key)
+
+    if formset_html is None:
+        logger.info('Rendering blank formset [%s]' % name)
+        formset_html = render_to_string(FORMSET_TEMPLATE, {'formset': create_formset()})
+        blank_formsets.set(key, formset_html)
+
+    return formset_html
@@ -4,17 +4,21 @@ import logging
 # form third-party applications
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Div
-from django.forms import ModelForm, HiddenInput, CharField, ValidationError, Select
+from django.forms import HiddenInput, CharField, ValidationError, Select, Form, MultipleChoiceField, \
+    CheckboxSelectMultiple
 
 # from main application
+from opd_application.forms.general_forms import ReferenceChoiceFormSet, ReferenceModelChoiceField, ReferenceModelForm
 from opd_application.messages import INVALID_LABORATORY_RESULT_VALUE
-from opd_application.models.laboratory_models import LaboratoryResult, LaboratoryTestDetailChoice
+from opd_application.models.laboratory_models import LaboratoryResult, LaboratoryTestDetailChoice, \
+    LaboratoryTestDetail, LaboratoryTest
+from opd_application.reference_data import get_reference_records
 from opd_application.widgets import FixedInputWidget
 
 logger = logging.getLogger(__name__)
 
 
-class LaboratoryResultForm(ModelForm):
+class LaboratoryResultForm(ReferenceModelForm):
     """
     Form for creating a new laboratory result record for a specific laboratory record
     """
@@ -41,6 +45,9 @@ class LaboratoryResultForm(ModelForm):
         widgets = {
             'laboratory_test_detail': HiddenInput(),
         }
+        field_classes = {
+            'laboratory_test_detail': ReferenceModelChoiceField,
+        }
 
     def clean_value(self):
         """
@@ -50,9 +57,9 @@ class LaboratoryResultForm(ModelForm):
         """
 
         input_value = self.cleaned_data['value']
-        laboratory_test_detail = self.cleaned_data['laboratory_test_detail']
+        laboratory_test_detail = self.cleaned_data.get('laboratory_test_detail')
 
-        if not input_value:
+        if not input_value or not laboratory_test_detail:
             logger.info('Skipping validation due to blank input')
             return input_value
 
@@ -73,24 +80,14 @@ class LaboratoryResultForm(ModelForm):
 
     def __init__(self, *args, **kwargs):
         """
-        Retrieves initial data for laboratory test detail choice retrieval. During validation, data is retrieved from
-        [data] in kwargs
+        Creates dropdown for value field using choices of the laboratory test detail displayed by this form. Choices are
+        handed over by BaseLaboratoryResultFormSet
         :param args:    variable arguments
-        :param kwargs:  named arguments
+        :param kwargs:  named arguments, [row_record] is the laboratory test detail and [choices] its choices
         """
-        choice_list = None
-
-        if kwargs.get('data'):
-            laboratory_test_detail = kwargs.get('data')['%s-laboratory_test_detail' % kwargs.get('prefix')]
-        elif kwargs.get('initial'):
-            laboratory_test_detail = kwargs.get('initial')['laboratory_test_detail']
-        else:
-            laboratory_test_detail = None
 
-        if laboratory_test_detail:
-            choice_list = LaboratoryTestDetailChoice.objects.filter(
-                laboratory_test_detail=laboratory_test_detail).values_list('description',
-                                                                           'description')
+        kwargs.pop('row_record', None)
+        choice_list = kwargs.pop('choices', None)
 
         super(LaboratoryResultForm, self).__init__(*args, **kwargs)
 
@@ -98,4 +95,45 @@ class LaboratoryResultForm(ModelForm):
         self.fields['value'].label = ""
 
         if choice_list:
-            self.fields['value'].widget = Select(choices=list(choice_list))
+            self.fields['value'].widget = Select(choices=[(choice.description, choice.description)
+                                                          for choice in choice_list])
+
+
+class BaseLaboratoryResultFormSet(ReferenceChoiceFormSet):
+    """
+    Formset of LaboratoryResultForm, one form for each laboratory test detail. Choices of all test details are retrieved
+    at once.
+    """
+
+    row_model = LaboratoryTestDetail
+    row_field_name = 'laboratory_test_detail'
+    choice_model = LaboratoryTestDetailChoice
+    choice_row_field_name = 'laboratory_test_detail'
+
+
+class LaboratoryTestSelectionForm(Form):
+    """
+    Form for choosing the laboratory test panels ordered for a laboratory record. Choices are taken from the reference
+    data cache.
+    """
+
+    laboratory_tests = MultipleChoiceField(widget=CheckboxSelectMultiple(), label='Laboratory Tests')
+
+    def __init__(self, *args, **kwargs):
+        super(LaboratoryTestSelectionForm, self).__init__(*args, **kwargs)
+
+        self.fields['laboratory_tests'].choices = [
+            (laboratory_test.id, laboratory_test.description)
+            for laboratory_test in get_reference_records(LaboratoryTest, 'order')]
+
+    def clean_laboratory_tests(self):
+        """
+        Retrieves chosen laboratory tests from the reference data cache
+        :returns:   list of LaboratoryTest model instances, in display order
+        """
+
+        laboratory_test_ids = set(int(laboratory_test_id)
+                                  for laboratory_test_id in self.cleaned_data['laboratory_tests'])
+
+        return [laboratory_test for laboratory_test in get_reference_records(LaboratoryTest, 'order')
+                if laboratory_test.id in laboratory_test_ids]
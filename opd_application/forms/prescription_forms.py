@@ -4,9 +4,11 @@ import logging
 # form third-party applications
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Div
-from django.forms import ModelForm, BooleanField, CharField, HiddenInput
+from django.forms import BooleanField, CharField, HiddenInput, BaseFormSet, ValidationError
 
 # from main application
+from opd_application.forms.general_forms import ReferenceModelChoiceField, ReferenceModelForm
+from opd_application.messages import DUPLICATE_MEDICINE
 from opd_application.models.prescription_models import PrescriptionEntry
 from opd_application.widgets import FixedInputWidget
 from opd_application.functions import log_start_time, log_end_time
@@ -14,7 +16,7 @@ from opd_application.functions import log_start_time, log_end_time
 logger = logging.getLogger(__name__)
 
 
-class PrescriptionEntryForm(ModelForm):
+class PrescriptionEntryForm(ReferenceModelForm):
     """
     Form for creating a new diagnosis entry record for a specific diagnosis record
     """
@@ -34,6 +36,13 @@ class PrescriptionEntryForm(ModelForm):
         widgets = {
             'medicine': HiddenInput(),
         }
+        field_classes = {
+            'medicine': ReferenceModelChoiceField,
+            'dosage': ReferenceModelChoiceField,
+            'package': ReferenceModelChoiceField,
+            'frequency': ReferenceModelChoiceField,
+            'designated_time': ReferenceModelChoiceField,
+        }
 
     def __init__(self, *args, **kwargs):
         super(PrescriptionEntryForm, self).__init__(*args, **kwargs)
@@ -47,6 +56,28 @@ class PrescriptionEntryForm(ModelForm):
         self.helper = PrescriptionEntryFormHelper()
 
 
+class BasePrescriptionEntryFormSet(BaseFormSet):
+    """
+    Formset holding a form for each medicine picked for a prescription record, instead of one for every medicine.
+    """
+
+    def clean(self):
+        """
+        Checks that no medicine is picked more than once
+        :raises:    ValidationError
+        :return:    None
+        """
+
+        if any(self.errors):
+            return
+
+        medicines = [form.cleaned_data.get('medicine') for form in self.forms if form.cleaned_data]
+
+        if len(medicines) != len(set(medicines)):
+            logger.warn('Received duplicate medicines')
+            raise ValidationError(DUPLICATE_MEDICINE)
+
+
 class PrescriptionEntryFormHelper(FormHelper):
     def __init__(self, *args, **kwargs):
         super(PrescriptionEntryFormHelper, self).__init__(*args, **kwargs)
@@ -0,0 +1,146 @@
+# from python library
+import logging
+
+# from third-party applications
+from django.db.models import Subquery, Case, When, Min, Max, F
+
+# from main application
+from opd_application.functions import log_start_time, log_end_time
+from opd_application.models.laboratory_models import LaboratoryTest, LaboratoryResult
+from opd_application.models.medical_history_models import MedicalHistory, MedicalHistoryDetail, MedicalHistoryCategory
+from opd_application.reference_data import get_reference_records
+
+logger = logging.getLogger(__name__)
+
+
+def load_latest_medical_history_details(patient):
+    """
+    Function for retrieving details of a patient's latest medical history record with a single query. The latest record
+    is chosen by a subquery, and categories and units of each detail are retrieved together with it.
+    :param patient: Patient model instance
+    :return:        dictionary of medical history category detail id to MedicalHistoryDetail model instance, empty if
+                    patient has no medical history record
+    """
+
+    log_start_time()
+
+    logger.info('Retrieving details of latest medical history record of patient [%s]' % patient)
+    latest_medical_history = MedicalHistory.objects.filter(patient=patient).order_by('-id').values('id')[:1]
+    medical_history_details = MedicalHistoryDetail.objects.filter(
+        medical_history=Subquery(latest_medical_history)).select_related(
+        'medical_history_category_detail__medical_history_category',
+        'medical_history_category_detail__medical_history_category_unit').order_by('id')
+
+    details_per_category_detail = {detail.medical_history_category_detail_id: detail
+                                   for detail in medical_history_details}
+
+    log_end_time()
+    return details_per_category_detail
+
+
+def load_laboratory_results_per_test(laboratory):
+    """
+    Function for retrieving non-deleted results of a laboratory record with a single query, grouped by laboratory test.
+    Test details and measurement units of each result are retrieved together with it. Results are ordered by test
+    detail order within each test.
+    :param laboratory:  Laboratory model instance
+    :return:            list of (LaboratoryTest model instance, list of LaboratoryResult model instances) pairs for
+                        every laboratory test in display order, with an empty list for tests without results
+    """
+
+    log_start_time()
+
+    logger.info('Retrieving results of laboratory record [%s]' % laboratory.id)
+    laboratory_results = LaboratoryResult.objects.filter(laboratory=laboratory, is_deleted=False).select_related(
+        'laboratory_test_detail__laboratory_test', 'laboratory_test_detail__laboratory_measurement_unit')
+
+    results_per_test = {}
+    for laboratory_result in sorted(laboratory_results, key=lambda result: (
+            result.laboratory_test_detail.order, result.laboratory_test_detail_id, result.id)):
+        results_per_test.setdefault(laboratory_result.laboratory_test_detail.laboratory_test_id, []).append(
+            laboratory_result)
+
+    test_results = [(laboratory_test, results_per_test.get(laboratory_test.id, []))
+                    for laboratory_test in get_reference_records(LaboratoryTest, 'order')]
+
+    log_end_time()
+    return test_results
+
+
+def load_entries_per_key(query_set, key_field_name, keys):
+    """
+    Function for retrieving entries of a record (e.g. diagnosis entries of a diagnosis record) with a single query,
+    grouped by the reference record they belong to (e.g. diagnosis category).
+    :param query_set:       QuerySet of entries of a record
+    :param key_field_name:  name of foreign key of entries to reference record
+    :param keys:            list of reference model instances in display order
+    :return:                list of (reference model instance, list of entries in id order) pairs for every key, with an
+                            empty list for keys without entries
+    """
+
+    log_start_time()
+
+    logger.info('Retrieving [%s] records grouped by [%s]' % (query_set.model._meta.label, key_field_name))
+    key_attname = query_set.model._meta.get_field(key_field_name).attname
+    entries_per_key = {}
+
+    for entry in query_set.order_by('id'):
+        entries_per_key.setdefault(getattr(entry, key_attname), []).append(entry)
+
+    key_entries = [(key, entries_per_key.get(key.id, [])) for key in keys]
+
+    log_end_time()
+    return key_entries
+
+
+def load_adjacent_record_ids(record, parent_field_name):
+    """
+    Function for retrieving ids of the previous and next records sharing the same parent record (e.g. physical exams of
+    a medical record) with a single query.
+    :param record:              model instance
+    :param parent_field_name:   name of foreign key to parent record
+    :return:                    tuple of previous record id and next record id, None if there is no such record
+    """
+
+    parent_attname = record._meta.get_field(parent_field_name).attname
+
+    logger.info('Retrieving previous and next records of [%s]' % record)
+    adjacent_ids = type(record).objects.filter(**{parent_attname: getattr(record, parent_attname)}).aggregate(
+        prev_id=Max(Case(When(id__lt=record.id, then=F('id')))),
+        next_id=Min(Case(When(id__gt=record.id, then=F('id')))))
+
+    return adjacent_ids['prev_id'], adjacent_ids['next_id']
+
+
+def load_medical_history_details_per_category(medical_history):
+    """
+    Function for retrieving details of a medical history record with a single query, grouped by medical history
+    category. Category details and units of each detail are retrieved together with it, and details are ordered by
+    category and category detail order.
+    :param medical_history: MedicalHistory model instance
+    :return:                list of (MedicalHistoryCategory model instance, list of MedicalHistoryDetail model
+                            instances) pairs for every category in display order, with an empty list for categories
+                            without details
+    """
+
+    log_start_time()
+
+    logger.info('Retrieving details of medical history record [%s]' % medical_history.id)
+    medical_history_details = MedicalHistoryDetail.objects.filter(medical_history=medical_history).select_related(
+        'medical_history_category_detail__medical_history_category',
+        'medical_history_category_detail__medical_history_category_unit').order_by(
+        'medical_history_category_detail__medical_history_category__order',
+        'medical_history_category_detail__medical_history_category_id',
+        'medical_history_category_detail__order', 'medical_history_category_detail_id', 'id')
+
+    details_per_category = {}
+    for medical_history_detail in medical_history_details:
+        details_per_category.setdefault(
+            medical_history_detail.medical_history_category_detail.medical_history_category_id, []).append(
+            medical_history_detail)
+
+    category_details = [(category, details_per_category.get(category.id, []))
+                        for category in get_reference_records(MedicalHistoryCategory, 'order')]
+
+    log_end_time()
+    return category_details
@@ -0,0 +1,22 @@
+# from third-party applications
+from django.core.management.base import BaseCommand
+from django.db.transaction import atomic
+
+# from main application
+from opd_application.record_counts import rebuild_record_counts
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the physical exam, laboratory, diagnosis and prescription counts of every medical record. Needed for
+    medical records saved before the counts existed or records changed without triggering model signals (e.g. bulk
+    deletes or fixture loading).
+    """
+
+    help = 'Rebuilds record counts of all medical records'
+
+    def handle(self, *args, **options):
+        with atomic():
+            rebuild_record_counts()
+
+        self.stdout.write('Rebuilt record counts of medical records')
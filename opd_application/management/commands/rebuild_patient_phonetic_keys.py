@@ -0,0 +1,28 @@
+# from third-party applications
+from django.core.management.base import BaseCommand
+from django.db.transaction import atomic
+
+# from main application
+from opd_application.models.patient_models import Patient
+from opd_application.search import set_phonetic_keys
+
+
+class Command(BaseCommand):
+    """
+    Sets phonetic keys of all patients. Needed for patients that were saved before phonetic keys existed or were
+    changed without triggering model signals (e.g. bulk updates).
+    """
+
+    help = 'Rebuilds phonetic name keys for all patients'
+
+    def handle(self, *args, **options):
+        patient_count = 0
+
+        with atomic():
+            for patient in Patient.objects.only('id', 'last_name', 'first_name').iterator():
+                set_phonetic_keys(patient)
+                Patient.objects.filter(pk=patient.pk).update(last_name_phonetic=patient.last_name_phonetic,
+                                                             first_name_phonetic=patient.first_name_phonetic)
+                patient_count += 1
+
+        self.stdout.write('Updated %s patients' % patient_count)
@@ -0,0 +1,41 @@
+# from third-party applications
+from django.core.management.base import BaseCommand
+from django.db.transaction import atomic
+
+# from main application
+from opd_application.models.patient_models import Patient
+from opd_application.models.search_models import PatientSearchToken
+from opd_application.search import PATIENT_INDEXED_FIELDS, create_search_tokens
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the patient search index from scratch. Needed for patients that were saved before the search index
+    existed or were changed without triggering model signals (e.g. bulk updates).
+    """
+
+    help = 'Rebuilds search tokens for all patients'
+
+    def handle(self, *args, **options):
+        search_tokens = []
+        patient_count = 0
+
+        with atomic():
+            PatientSearchToken.objects.all().delete()
+
+            for patient in Patient.objects.only(*PATIENT_INDEXED_FIELDS.keys()).iterator():
+                patient_count += 1
+
+                for field_name, field in PATIENT_INDEXED_FIELDS.items():
+                    for token in create_search_tokens(getattr(patient, field_name)):
+                        search_tokens.append(PatientSearchToken(patient_id=patient.id, field=field, token=token))
+
+                if len(search_tokens) >= BATCH_SIZE:
+                    PatientSearchToken.objects.bulk_create(search_tokens)
+                    search_tokens = []
+
+            PatientSearchToken.objects.bulk_create(search_tokens)
+
+        self.stdout.write('Indexed %s patients' % patient_count)
@@ -0,0 +1,55 @@
+# from third-party applications
+from django.core.management.base import BaseCommand
+from django.db.transaction import atomic
+
+# from main application
+from opd_application.models.diagnosis_models import Diagnosis
+from opd_application.models.laboratory_models import Laboratory
+from opd_application.models.medical_record_models import MedicalRecord
+from opd_application.models.patient_models import Patient
+from opd_application.models.physical_exam_models import PhysicalExam
+from opd_application.models.prescription_models import Prescription
+from opd_application.models.search_models import SearchDocument
+from opd_application.search import create_search_document
+
+BATCH_SIZE = 1000
+
+# record models and the related objects needed for creating their search documents
+INDEXED_MODELS = [
+    (Patient, ['created_by']),
+    (MedicalRecord, ['patient', 'recorded_by']),
+    (PhysicalExam, ['medical_record__patient', 'recorded_by']),
+    (Laboratory, ['medical_record__patient', 'recorded_by']),
+    (Diagnosis, ['medical_record__patient', 'recorded_by']),
+    (Prescription, ['medical_record__patient', 'recorded_by']),
+]
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds search documents of patients and all record types from scratch. Needed for records that were saved
+    before search documents existed or were changed without triggering model signals (e.g. bulk updates or renamed
+    encoders).
+    """
+
+    help = 'Rebuilds search documents for patients and all record types'
+
+    def handle(self, *args, **options):
+        search_documents = []
+        record_count = 0
+
+        with atomic():
+            SearchDocument.objects.all().delete()
+
+            for model, related_fields in INDEXED_MODELS:
+                for instance in model.objects.select_related(*related_fields).iterator():
+                    record_count += 1
+                    search_documents.append(create_search_document(instance))
+
+                    if len(search_documents) >= BATCH_SIZE:
+                        SearchDocument.objects.bulk_create(search_documents)
+                        search_documents = []
+
+            SearchDocument.objects.bulk_create(search_documents)
+
+        self.stdout.write('Indexed %s records' % record_count)
@@ -8,4 +8,5 @@ INVALID_MEDICAL_HISTORY_DETAIL_VALUE = 'Invalid Measurement Value'
 INVALID_LABORATORY_RESULT_VALUE = 'Invalid Measurement Value'
 INVALID_SEARCH_PARAMETER_VALUE = 'Invalid Search Parameter Value/s Received'
 CANNOT_DELETE_ALL_FORMS = 'Cannot Delete All Forms'
-MINIMUM_REQUIRED_NUMBER_OF_FORMS = 'Please provide at least one valid entry.'
\ No newline at end of file
+MINIMUM_REQUIRED_NUMBER_OF_FORMS = 'Please provide at least one valid entry.'
+DUPLICATE_MEDICINE = 'Each medicine can only be prescribed once'
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('opd_application', '0009_auto_20160325_1415'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PatientSearchToken',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('L', 'Last Name'), ('F', 'First Name')], max_length=1)),
+                ('token', models.CharField(max_length=3)),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='opd_application.Patient')),
+            ],
+            options={
+                'verbose_name': 'Patient Search Token',
+                'verbose_name_plural': 'Patient Search Tokens',
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='patientsearchtoken',
+            index_together=set([('field', 'token', 'patient')]),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('opd_application', '0010_patientsearchtoken'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='diagnosis',
+            name='recorded_date',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='laboratory',
+            name='recorded_date',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='medicalrecord',
+            name='recorded_date',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='patient',
+            name='birth_date',
+            field=models.DateField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='physicalexam',
+            name='recorded_date',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='prescription',
+            name='recorded_date',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
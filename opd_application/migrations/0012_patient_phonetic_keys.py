@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('opd_application', '0011_date_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='first_name_phonetic',
+            field=models.CharField(blank=True, editable=False, max_length=25),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='last_name_phonetic',
+            field=models.CharField(blank=True, editable=False, max_length=25),
+        ),
+        migrations.AlterIndexTogether(
+            name='patient',
+            index_together=set([('last_name_phonetic', 'first_name_phonetic')]),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('opd_application', '0012_patient_phonetic_keys'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='patient',
+            name='last_name',
+            field=models.CharField(db_index=True, max_length=25),
+        ),
+    ]
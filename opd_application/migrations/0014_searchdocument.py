@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('opd_application', '0013_patient_last_name_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('record_type', models.CharField(choices=[('P', 'Patients'), ('M', 'Medical Records'), ('E', 'Physical Exams'), ('L', 'Laboratory Results'), ('D', 'Diagnoses'), ('R', 'Prescriptions')], max_length=1)),
+                ('record_id', models.PositiveIntegerField()),
+                ('patient_name', models.CharField(max_length=100)),
+                ('encoder_name', models.CharField(blank=True, max_length=100)),
+                ('recorded_date', models.DateTimeField(db_index=True)),
+                ('patient_last_name', models.CharField(max_length=25)),
+                ('encoder_last_name', models.CharField(blank=True, max_length=30)),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='opd_application.Patient')),
+            ],
+            options={
+                'verbose_name': 'Search Document',
+                'verbose_name_plural': 'Search Documents',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='searchdocument',
+            unique_together=set([('record_type', 'record_id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='searchdocument',
+            index_together=set([('patient_last_name', 'recorded_date'), ('encoder_last_name', 'recorded_date')]),
+        ),
+    ]
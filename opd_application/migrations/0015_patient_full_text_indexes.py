@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+from django.db.utils import OperationalError
+
+MYSQL_CREATE_STATEMENTS = [
+    'CREATE FULLTEXT INDEX opd_application_patient_last_name_ft ON opd_application_patient (last_name)',
+    'CREATE FULLTEXT INDEX opd_application_patient_first_name_ft ON opd_application_patient (first_name)',
+]
+
+MYSQL_DROP_STATEMENTS = [
+    'DROP INDEX opd_application_patient_last_name_ft ON opd_application_patient',
+    'DROP INDEX opd_application_patient_first_name_ft ON opd_application_patient',
+]
+
+# external content FTS5 table kept in sync with the patient table by triggers
+SQLITE_CREATE_STATEMENTS = [
+    "CREATE VIRTUAL TABLE opd_application_patient_fts USING fts5(last_name, first_name, "
+    "content='opd_application_patient', content_rowid='id', tokenize='unicode61 remove_diacritics 1')",
+    "CREATE TRIGGER opd_application_patient_fts_insert AFTER INSERT ON opd_application_patient BEGIN "
+    "INSERT INTO opd_application_patient_fts (rowid, last_name, first_name) "
+    "VALUES (new.id, new.last_name, new.first_name); END",
+    "CREATE TRIGGER opd_application_patient_fts_delete AFTER DELETE ON opd_application_patient BEGIN "
+    "INSERT INTO opd_application_patient_fts (opd_application_patient_fts, rowid, last_name, first_name) "
+    "VALUES ('delete', old.id, old.last_name, old.first_name); END",
+    "CREATE TRIGGER opd_application_patient_fts_update AFTER UPDATE ON opd_application_patient BEGIN "
+    "INSERT INTO opd_application_patient_fts (opd_application_patient_fts, rowid, last_name, first_name) "
+    "VALUES ('delete', old.id, old.last_name, old.first_name); "
+    "INSERT INTO opd_application_patient_fts (rowid, last_name, first_name) "
+    "VALUES (new.id, new.last_name, new.first_name); END",
+    "INSERT INTO opd_application_patient_fts (opd_application_patient_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DROP_STATEMENTS = [
+    'DROP TRIGGER IF EXISTS opd_application_patient_fts_insert',
+    'DROP TRIGGER IF EXISTS opd_application_patient_fts_delete',
+    'DROP TRIGGER IF EXISTS opd_application_patient_fts_update',
+    'DROP TABLE IF EXISTS opd_application_patient_fts',
+]
+
+
+def create_full_text_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        for statement in MYSQL_CREATE_STATEMENTS:
+            schema_editor.execute(statement)
+    elif schema_editor.connection.vendor == 'sqlite':
+        try:
+            for statement in SQLITE_CREATE_STATEMENTS:
+                schema_editor.execute(statement)
+        except OperationalError:
+            # SQLite was compiled without FTS5, only the ORM search backend can be used
+            for statement in SQLITE_DROP_STATEMENTS:
+                schema_editor.execute(statement)
+
+
+def drop_full_text_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        for statement in MYSQL_DROP_STATEMENTS:
+            schema_editor.execute(statement)
+    elif schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_DROP_STATEMENTS:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('opd_application', '0014_searchdocument'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_full_text_indexes, drop_full_text_indexes),
+    ]
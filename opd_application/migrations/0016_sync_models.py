@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 11:00
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# models created from the model definitions before this migration existed, in an order where referenced tables come
+# first
+SYNCED_MODELS = [
+    'DesignatedTime',
+    'Dosage',
+    'Frequency',
+    'Package',
+    'Medicine',
+    'DiagnosisCategory',
+    'DiagnosisCategoryChoice',
+    'DiagnosisEntry',
+    'LaboratoryMeasurementUnit',
+    'LaboratoryTest',
+    'LaboratoryTestDetail',
+    'LaboratoryTestDetailChoice',
+    'LaboratoryResult',
+    'Medication',
+    'MedicationEntry',
+    'PrescriptionEntry',
+]
+
+
+def create_missing_tables(apps, schema_editor):
+    """
+    Creates tables and columns of synced models that are not in the database yet. Databases created from the model
+    definitions already have them and are left untouched.
+    """
+
+    introspection = schema_editor.connection.introspection
+
+    for model_name in SYNCED_MODELS:
+        model = apps.get_model('opd_application', model_name)
+        table_name = model._meta.db_table
+
+        with schema_editor.connection.cursor() as cursor:
+            table_names = introspection.table_names(cursor)
+
+            if table_name not in table_names:
+                schema_editor.create_model(model)
+                continue
+
+            column_names = [column.name for column in introspection.get_table_description(cursor, table_name)]
+
+        for field in model._meta.local_fields:
+            if field.column not in column_names:
+                schema_editor.add_field(model, field)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('opd_application', '0015_patient_full_text_indexes'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.CreateModel(
+                name='DesignatedTime',
+                fields=[
+                    ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                    ('description', models.CharField(max_length=50)),
+                    ('order', models.PositiveIntegerField(default=1)),
+                ],
+                options={
+                    'verbose_name': 'Designated Time',
+                    'verbose_name_plural': 'Designated Times',
+                },
+            ),
+            migrations.CreateModel(
+                name='DiagnosisCategory',
+                fields=[
+                    ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                    ('description', models.CharField(max_length=50)),
+                    ('group', models.PositiveIntegerField(default=1)),
+                    ('level', models.PositiveIntegerField(default=1)),
+                    ('order', models.PositiveIntegerField(default=1)),
+                ],
+                options={
+                    'verbose_name': 'Diagnosis Category',
+                    'verbose_name_plural': 'Diagnosis Categories',
+                },
+            ),
+            migrations.CreateModel(
+                name='DiagnosisCategoryChoice',
+                fields=[
+                    ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                    ('description', models.CharField(max_length=50)),
+                    ('order', models.PositiveIntegerField(default=1)),
+                    ('is_general_term', models.BooleanField(default=False)),
+                    ('diagnosis_category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='opd_application.DiagnosisCategory')),
+                ],
+                options={
+                    'verbose_name': 'Diagnosis Category Choice',
+                    'verbose_name_plural': 'Diagnosis Category Choices',
+                },
+            ),
+            migrations.CreateModel(
+                name='DiagnosisEntry',
+                fields=[
+                    ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                    ('value', models.CharField(blank=True, max_length=50)),
+                    ('remark', models.CharField(blank=True, max_length=100)),
+                    ('updated_date', models.DateTimeField(blank=True)),
+                    ('diagnosis', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='opd_application.Diagnosis')),
+                    ('diagnosis_category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='opd_application.DiagnosisCategory')),
+                    ('updated_by', models.ForeignKey(blank=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ],
+            ),
+            migrations.CreateModel(
+                name='Dosage',
+                fields=[
+                    ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                    ('description', models.CharField(max_length=50)),
+                    ('order', models.PositiveIntegerField(default=1)),
+                ],
+                options={
+                    'verbose_name': 'Dosage',
+                    'verbose_name_plural': 'Dosages',
+                },
+            ),
+            migrations.CreateModel(
+                name='Frequency',
+                fields=[
+                    ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                    ('description', models.CharField(max_length=50)),
+                    ('order', models.PositiveIntegerField(default=1)),
+                ],
+                options={
+                    'verbose_name': 'Frequency',
+                    'verbose_name_plural': 'Frequencies',
+                },
+            ),
+            migrations.CreateModel(
+                name='LaboratoryMeasurementUnit',
+                fields=[
+                    ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                    ('description', models.CharField(max_length=50)),
+                    ('is_displayable', models.BooleanField(default=True)),
+                    ('is_validatable', models.BooleanField(default=True)),
+                ],
+                options={
+                    'verbose_name': 'Laboratory Measurement Unit',
+                    'verbose_name_plural': 'Laboratory Measurement Units',
+                },
+            ),
+            migrations.CreateModel(
+                name='LaboratoryResult',
+                fields=[
+                    ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                    ('value', models.CharField(blank=True, max_length=100)),
+                    ('is_deleted', models.BooleanField(default=False)),
+                    ('updated_date', models.DateTimeField(blank=True)),
+                    ('laboratory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='opd_application.Laboratory')),
+                ],
+            ),
+            migrations.CreateModel(
+                name='LaboratoryTest',
+                fields=[
+                    ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                    ('description', models.CharField(max_length=50)),
+                    ('order', models.PositiveIntegerField(default=1)),
+                ],
+                options={
+                    'verbose_name': 'Laboratory Test',
+                    'verbose_name_plural': 'Laboratory Tests',
+                },
+            ),
+            migrations.CreateModel(
+                name='LaboratoryTestDetail',
+                fields=[
+                    ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                    ('description', models.CharField(max_length=50)),
+                    ('order', models.PositiveIntegerField(default=1)),
+                    ('laboratory_measurement_unit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='opd_application.LaboratoryMeasurementUnit')),
+                    ('laboratory_test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='opd_application.LaboratoryTest')),
+                ],
+                options={
+                    'verbose_name': 'Laboratory Test Detail',
+                    'verbose_name_plural': 'Laboratory Test Details',
+                },
+            ),
+            migrations.CreateModel(
+                name='LaboratoryTestDetailChoice',
+                fields=[
+                    ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                    ('description', models.CharField(max_length=50)),
+                    ('laboratory_test_detail', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='opd_application.LaboratoryTestDetail')),
+                ],
+                options={
+                    'verbose_name': 'Laboratory Test Detail Choice',
+                    'verbose_name_plural': 'Laboratory Test Detail Choices',
+                },
+            ),
+            migrations.CreateModel(
+                name='Medication',
+                fields=[
+                    ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                    ('recorded_date', models.DateTimeField(auto_now=True)),
+                ],
+            ),
+            migrations.CreateModel(
+                name='MedicationEntry',
+                fields=[
+                    ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                    ('description', models.CharField(max_length=50)),
+                    ('designated_time', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='opd_application.DesignatedTime')),
+                    ('dosage', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='opd_application.Dosage')),
+                    ('frequency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='opd_application.Frequency')),
+                    ('medication', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='opd_application.Medication')),
+                ],
+            ),
+            migrations.CreateModel(
+                name='Medicine',
+                fields=[
+                    ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                    ('description', models.CharField(max_length=50)),
+                    ('order', models.PositiveIntegerField(default=1)),
+                ],
+                options={
+                    'verbose_name': 'Medicine',
+                    'verbose_name_plural': 'Medicines',
+                },
+            ),
+            migrations.CreateModel(
+                name='Package',
+                fields=[
+                    ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                    ('description', models.CharField(max_length=50)),
+                    ('order', models.PositiveIntegerField(default=1)),
+                ],
+                options={
+                    'verbose_name': 'Package',
+                    'verbose_name_plural': 'Package',
+                },
+            ),
+            migrations.CreateModel(
+                name='PrescriptionEntry',
+                fields=[
+                    ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                    ('is_deleted', models.BooleanField(default=False)),
+                    ('updated_date', models.DateTimeField(blank=True)),
+                    ('designated_time', models.ForeignKey(blank=True, on_delete=django.db.models.deletion.CASCADE, to='opd_application.DesignatedTime')),
+                    ('dosage', models.ForeignKey(blank=True, on_delete=django.db.models.deletion.CASCADE, to='opd_application.Dosage')),
+                    ('frequency', models.ForeignKey(blank=True, on_delete=django.db.models.deletion.CASCADE, to='opd_application.Frequency')),
+                    ('medicine', models.ForeignKey(blank=True, on_delete=django.db.models.deletion.CASCADE, to='opd_application.Medicine')),
+                    ('package', models.ForeignKey(blank=True, on_delete=django.db.models.deletion.CASCADE, to='opd_application.Package')),
+                    ('prescription', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='opd_application.Prescription')),
+                    ('updated_by', models.ForeignKey(blank=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ],
+            ),
+            migrations.AddField(
+                model_name='medicationentry',
+                name='package',
+                field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='opd_application.Package'),
+            ),
+            migrations.AddField(
+                model_name='medication',
+                name='patient',
+                field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='opd_application.Patient'),
+            ),
+            migrations.AddField(
+                model_name='medication',
+                name='recorded_by',
+                field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='created_by', to=settings.AUTH_USER_MODEL),
+            ),
+            migrations.AddField(
+                model_name='laboratoryresult',
+                name='laboratory_test_detail',
+                field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='opd_application.LaboratoryTestDetail'),
+            ),
+            migrations.AddField(
+                model_name='laboratoryresult',
+                name='updated_by',
+                field=models.ForeignKey(blank=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+            ),
+        ]),
+        migrations.RunPython(create_missing_tables, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 11:00
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('opd_application', '0016_sync_models'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='laboratory',
+            name='ordered_tests',
+            field=models.ManyToManyField(blank=True, to='opd_application.LaboratoryTest'),
+        ),
+    ]
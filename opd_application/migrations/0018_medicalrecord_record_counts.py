@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 11:03
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+# record models counted for each medical record and the MedicalRecord field holding their number
+COUNTED_MODELS = {
+    'PhysicalExam': 'physical_exam_count',
+    'Laboratory': 'laboratory_count',
+    'Diagnosis': 'diagnosis_count',
+    'Prescription': 'prescription_count',
+}
+
+
+def fill_record_counts(apps, schema_editor):
+    medical_record_model = apps.get_model('opd_application', 'MedicalRecord')
+
+    for model_name, field_name in COUNTED_MODELS.items():
+        model = apps.get_model('opd_application', model_name)
+        record_count = model.objects.filter(medical_record=OuterRef('pk')).order_by().values(
+            'medical_record').annotate(record_count=Count('id')).values('record_count')
+        medical_record_model.objects.update(**{field_name: Coalesce(Subquery(record_count, output_field=IntegerField()),
+                                                                    Value(0))})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('opd_application', '0017_laboratory_ordered_tests'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicalrecord',
+            name='diagnosis_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='medicalrecord',
+            name='laboratory_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='medicalrecord',
+            name='physical_exam_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='medicalrecord',
+            name='prescription_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_record_counts, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
 # from third-party applications
 from django.contrib.auth.models import User
-from django.db.models import Model, ForeignKey, DateTimeField, CharField, PositiveIntegerField, BooleanField
+from django.db.models import Model, ForeignKey, DateTimeField, CharField, PositiveIntegerField, BooleanField, \
+    ManyToManyField
 from django.urls import reverse_lazy
 
 # from main application
@@ -63,7 +64,10 @@ class Laboratory(Model):
     medical_record = ForeignKey(MedicalRecord)
 
     recorded_by = ForeignKey(User)
-    recorded_date = DateTimeField(auto_now=True)
+    recorded_date = DateTimeField(auto_now=True, db_index=True)
+
+    # laboratory test panels ordered for this record, only their details are displayed on the laboratory form
+    ordered_tests = ManyToManyField(LaboratoryTest, blank=True)
 
     def get_absolute_url(self):
         return reverse_lazy(LABORATORY_PROFILE_PAGE_NAME, kwargs={'id': str(self.id)})
@@ -18,9 +18,15 @@ class MedicalRecord(models.Model):
     additional_info = models.CharField(max_length=100, blank=True)
 
     recorded_by = models.ForeignKey(User, related_name='mr_recorded_by')
-    recorded_date = models.DateTimeField(auto_now=True)
+    recorded_date = models.DateTimeField(auto_now=True, db_index=True)
     last_updated = models.DateTimeField(auto_now=False, null=True)
     last_updated_by = models.ForeignKey(User, related_name='mr_updated_by', null=True)
 
+    # number of records of each type kept for this medical record, maintained by signals of the record models
+    physical_exam_count = models.PositiveIntegerField(default=0)
+    laboratory_count = models.PositiveIntegerField(default=0)
+    diagnosis_count = models.PositiveIntegerField(default=0)
+    prescription_count = models.PositiveIntegerField(default=0)
+
     def get_absolute_url(self):
         return reverse_lazy('opd:medical', kwargs={'id': str(self.id)})
\ No newline at end of file
@@ -57,4 +57,21 @@ class DesignatedTime(Model):
         verbose_name_plural = 'Designated Times'
 
     def __str__(self):
-        return "%s" % self.description
\ No newline at end of file
+        return "%s" % self.description
+
+
+class CacheVersion(Model):
+    """
+    Current version of a group of cached values. Kept in the database so that every worker process sees versions moved
+    forward by the others, whichever cache backend is configured.
+    """
+
+    name = CharField(max_length=100, unique=True)
+    version = PositiveIntegerField(default=1)
+
+    class Meta:
+        verbose_name = 'Cache Version'
+        verbose_name_plural = 'Cache Versions'
+
+    def __str__(self):
+        return "%s: %s" % (self.name, self.version)
@@ -24,8 +24,8 @@ class Patient(models.Model):
 
     first_name = models.CharField(max_length=25)
     middle_name = models.CharField(max_length=25, blank=True)
-    last_name = models.CharField(max_length=25)
-    birth_date = models.DateField()
+    last_name = models.CharField(max_length=25, db_index=True)
+    birth_date = models.DateField(db_index=True)
     sex = models.CharField(max_length=1, choices=SEX_CHOICES)
     marital_status = models.CharField(max_length=1, choices=MARITAL_CHOICES)
 
@@ -43,8 +43,13 @@ class Patient(models.Model):
     last_updated = models.DateTimeField(auto_now=False, null=True)
     last_updated_by = models.ForeignKey(User, related_name='p_updated_by', null=True)
 
+    # sound-alike keys of last_name and first_name, kept up to date on save
+    last_name_phonetic = models.CharField(max_length=25, blank=True, editable=False)
+    first_name_phonetic = models.CharField(max_length=25, blank=True, editable=False)
+
     class Meta:
         unique_together = (('first_name', 'last_name', 'birth_date'),)
+        index_together = (('last_name_phonetic', 'first_name_phonetic'),)
 
     def __str__(self):
         return "%s, %s %s" % (self.last_name, self.first_name, self.middle_name)
@@ -75,7 +75,7 @@ class PhysicalExam(models.Model):
     medical_record = models.ForeignKey(MedicalRecord)
 
     recorded_by = models.ForeignKey(User)
-    recorded_date = models.DateTimeField(auto_now=True)
+    recorded_date = models.DateTimeField(auto_now=True, db_index=True)
 
     def get_absolute_url(self):
         return reverse_lazy('opd:exam', kwargs={'id': str(self.id)})
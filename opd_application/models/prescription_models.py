@@ -23,7 +23,7 @@ class Prescription(Model):
     medical_record = ForeignKey(MedicalRecord)
 
     recorded_by = ForeignKey(User)
-    recorded_date = DateTimeField(auto_now=True)
+    recorded_date = DateTimeField(auto_now=True, db_index=True)
 
     def get_absolute_url(self):
         return reverse_lazy(PRESCRIPTION_PROFILE_PAGE_NAME, kwargs={'id': str(self.id)})
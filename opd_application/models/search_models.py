@@ -0,0 +1,91 @@
+# from third-party applications
+from django.db.models import Model, ForeignKey, CharField, PositiveIntegerField, DateTimeField
+from django.urls import reverse_lazy
+
+# from main application
+from opd_application.constants import PATIENT_PROFILE_PAGE_NAME, MEDICAL_RECORD_PROFILE_PAGE_NAME, \
+    PHYSICAL_EXAM_PROFILE_PAGE_NAME, LABORATORY_PROFILE_PAGE_NAME, DIAGNOSIS_PROFILE_PAGE_NAME, \
+    PRESCRIPTION_PROFILE_PAGE_NAME
+from opd_application.models.patient_models import Patient
+
+
+class PatientSearchToken(Model):
+    """
+    Trigram of a patient name. Used for looking up patients by a part of their name without scanning the whole
+    patient table.
+    """
+
+    LAST_NAME = 'L'
+    FIRST_NAME = 'F'
+
+    FIELD_CHOICES = (
+        (LAST_NAME, 'Last Name'),
+        (FIRST_NAME, 'First Name'),
+    )
+
+    patient = ForeignKey(Patient)
+    field = CharField(max_length=1, choices=FIELD_CHOICES)
+    token = CharField(max_length=3)
+
+    class Meta:
+        verbose_name = 'Patient Search Token'
+        verbose_name_plural = 'Patient Search Tokens'
+        index_together = (('field', 'token', 'patient'),)
+
+    def __str__(self):
+        return "%s - %s: %s" % (self.patient, self.get_field_display(), self.token)
+
+
+class SearchDocument(Model):
+    """
+    Searchable copy of a patient or record together with the names it is searched by. Lets all record types be searched
+    with one query on one table instead of joining each record table to its patient.
+    """
+
+    PATIENT = 'P'
+    MEDICAL_RECORD = 'M'
+    PHYSICAL_EXAM = 'E'
+    LABORATORY = 'L'
+    DIAGNOSIS = 'D'
+    PRESCRIPTION = 'R'
+
+    RECORD_TYPE_CHOICES = (
+        (PATIENT, 'Patients'),
+        (MEDICAL_RECORD, 'Medical Records'),
+        (PHYSICAL_EXAM, 'Physical Exams'),
+        (LABORATORY, 'Laboratory Results'),
+        (DIAGNOSIS, 'Diagnoses'),
+        (PRESCRIPTION, 'Prescriptions'),
+    )
+
+    PROFILE_PAGE_NAMES = {
+        PATIENT: PATIENT_PROFILE_PAGE_NAME,
+        MEDICAL_RECORD: MEDICAL_RECORD_PROFILE_PAGE_NAME,
+        PHYSICAL_EXAM: PHYSICAL_EXAM_PROFILE_PAGE_NAME,
+        LABORATORY: LABORATORY_PROFILE_PAGE_NAME,
+        DIAGNOSIS: DIAGNOSIS_PROFILE_PAGE_NAME,
+        PRESCRIPTION: PRESCRIPTION_PROFILE_PAGE_NAME,
+    }
+
+    record_type = CharField(max_length=1, choices=RECORD_TYPE_CHOICES)
+    record_id = PositiveIntegerField()
+    patient = ForeignKey(Patient)
+    patient_name = CharField(max_length=100)
+    encoder_name = CharField(max_length=100, blank=True)
+    recorded_date = DateTimeField(db_index=True)
+
+    # normalised copies of names, searched by prefix
+    patient_last_name = CharField(max_length=25)
+    encoder_last_name = CharField(max_length=30, blank=True)
+
+    class Meta:
+        verbose_name = 'Search Document'
+        verbose_name_plural = 'Search Documents'
+        unique_together = (('record_type', 'record_id'),)
+        index_together = (('patient_last_name', 'recorded_date'), ('encoder_last_name', 'recorded_date'),)
+
+    def __str__(self):
+        return "%s #%s - %s" % (self.get_record_type_display(), self.record_id, self.patient_name)
+
+    def get_absolute_url(self):
+        return reverse_lazy(self.PROFILE_PAGE_NAMES[self.record_type], kwargs={'id': str(self.record_id)})
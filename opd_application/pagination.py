@@ -0,0 +1,191 @@
+# from python library
+import collections.abc
+import datetime
+import logging
+
+# from third-party applications
+from django.core import signing
+from django.db.models import Q, DateTimeField, DateField
+from django.utils.dateparse import parse_datetime, parse_date
+
+# from main application
+from opd_application.functions import log_start_time, log_end_time
+
+logger = logging.getLogger(__name__)
+
+CURSOR_SALT = 'opd_application.pagination.cursor'
+NEXT_DIRECTION = 'n'
+PREVIOUS_DIRECTION = 'p'
+
+
+class InvalidCursor(Exception):
+    """
+    Raised when a received cursor token was tampered with or does not match the paginated ordering.
+    """
+    pass
+
+
+class KeysetPage(collections.abc.Sequence):
+    """
+    Page of results retrieved by KeysetPaginator. Behaves like a list so templates can iterate over it the same way as
+    a Paginator page.
+    """
+
+    def __init__(self, object_list, number, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.number = number
+        self.next_cursor = next_cursor if has_next else None
+        self.previous_cursor = previous_cursor if has_previous else None
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator(object):
+    """
+    Paginator that seeks on the ordering values of the last (or first) row of the current page instead of using an
+    OFFSET. Retrieving any page costs the same as retrieving the first one, and no COUNT(*) query is made. Ordering is
+    taken from the given QuerySet and the primary key is appended as a tie breaker.
+    """
+
+    def __init__(self, query_set, per_page):
+        self.query_set = query_set
+        self.per_page = int(per_page)
+        self.model = query_set.model
+        self.ordering = []
+
+        for field_name in list(query_set.query.order_by) + ['-id']:
+            descending = field_name.startswith('-')
+            name = field_name.lstrip('-')
+            name = 'id' if name == 'pk' else name
+
+            if name not in [ordering_name for ordering_name, ordering_descending in self.ordering]:
+                self.ordering.append((name, descending))
+
+            if name == 'id':
+                break
+
+    def page(self, cursor=None):
+        """
+        Retrieves page of results located by cursor token.
+        :param cursor:  cursor token from a previous page, None for the first page
+        :raises:        InvalidCursor
+        :return:        KeysetPage instance
+        """
+
+        log_start_time()
+
+        if cursor:
+            direction, values, number = self.decode_cursor(cursor)
+        else:
+            direction, values, number = NEXT_DIRECTION, None, 1
+
+        reverse = direction == PREVIOUS_DIRECTION
+        query_set = self.query_set.order_by(*[('-' if descending != reverse else '') + name
+                                              for name, descending in self.ordering])
+
+        if values is not None:
+            logger.info('Seeking %s values [%s]' % ('before' if reverse else 'after', values))
+            query_set = query_set.filter(self.create_seek_filter(values, reverse))
+
+        object_list = list(query_set[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+
+        if reverse:
+            object_list.reverse()
+            has_previous, has_next = has_more, True
+        else:
+            has_previous, has_next = values is not None, has_more
+
+        if object_list:
+            next_cursor = self.encode_cursor(NEXT_DIRECTION, object_list[-1], number + 1)
+            previous_cursor = self.encode_cursor(PREVIOUS_DIRECTION, object_list[0], number - 1)
+        else:
+            next_cursor = previous_cursor = None
+
+        log_end_time()
+        return KeysetPage(object_list, number, has_next, has_previous, next_cursor, previous_cursor)
+
+    def create_seek_filter(self, values, reverse):
+        """
+        Creates filter for rows positioned after given ordering values. (a, b) > (x, y) is expanded to
+        a > x OR (a = x AND b > y) so that each branch can use an index.
+        :param values:  ordering values of boundary row
+        :param reverse: True if rows before the boundary row are needed
+        :return:        Q instance
+        """
+
+        seek_filter = Q()
+
+        for idx, (name, descending) in enumerate(self.ordering):
+            lookup = {'%s__%s' % (name, 'lt' if descending != reverse else 'gt'): values[idx]}
+            for equal_idx, (equal_name, equal_descending) in enumerate(self.ordering[:idx]):
+                lookup[equal_name] = values[equal_idx]
+            seek_filter |= Q(**lookup)
+
+        return seek_filter
+
+    def encode_cursor(self, direction, instance, number):
+        """
+        Creates opaque, signed cursor token from ordering values of a row.
+        :param direction:   NEXT_DIRECTION or PREVIOUS_DIRECTION
+        :param instance:    boundary row
+        :param number:      page number of page located by cursor
+        :return:            cursor token
+        """
+
+        values = []
+
+        for name, descending in self.ordering:
+            value = getattr(instance, name)
+            if isinstance(value, (datetime.date, datetime.datetime)):
+                value = value.isoformat()
+            values.append(value)
+
+        return signing.dumps([direction, values, number], salt=CURSOR_SALT, compress=True)
+
+    def decode_cursor(self, cursor):
+        """
+        Retrieves direction, ordering values and page number from cursor token.
+        :param cursor:  cursor token
+        :raises:        InvalidCursor
+        :return:        direction, ordering values and page number
+        """
+
+        try:
+            direction, values, number = signing.loads(cursor, salt=CURSOR_SALT)
+        except (signing.BadSignature, TypeError, ValueError):
+            logger.warn('Received an invalid cursor token')
+            raise InvalidCursor()
+
+        if direction not in (NEXT_DIRECTION, PREVIOUS_DIRECTION) or len(values) != len(self.ordering):
+            logger.warn('Cursor token does not match paginated ordering')
+            raise InvalidCursor()
+
+        try:
+            for idx, (name, descending) in enumerate(self.ordering):
+                field = self.model._meta.get_field(name)
+                if isinstance(field, DateTimeField):
+                    values[idx] = parse_datetime(values[idx])
+                elif isinstance(field, DateField):
+                    values[idx] = parse_date(values[idx])
+
+                if values[idx] is None:
+                    raise ValueError(name)
+
+            number = max(int(number), 1)
+        except (TypeError, ValueError):
+            logger.warn('Cursor token contains invalid ordering values')
+            raise InvalidCursor()
+
+        return direction, values, number
@@ -0,0 +1,75 @@
+# from python library
+import logging
+
+# from third-party applications
+from django.db.models import F, Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+# from main application
+from opd_application.functions import log_start_time, log_end_time
+from opd_application.models.diagnosis_models import Diagnosis
+from opd_application.models.laboratory_models import Laboratory
+from opd_application.models.medical_record_models import MedicalRecord
+from opd_application.models.physical_exam_models import PhysicalExam
+from opd_application.models.prescription_models import Prescription
+
+logger = logging.getLogger(__name__)
+
+# record models counted for each medical record and the MedicalRecord field holding their number
+COUNTED_MODELS = {
+    PhysicalExam: 'physical_exam_count',
+    Laboratory: 'laboratory_count',
+    Diagnosis: 'diagnosis_count',
+    Prescription: 'prescription_count',
+}
+
+
+def change_record_count(instance, change):
+    """
+    Function for adding to or subtracting from the number of records of a type kept on their medical record. The count
+    is changed by the database in a single UPDATE, so concurrent changes are not lost. Counts never go below zero.
+    :param instance:    PhysicalExam, Laboratory, Diagnosis or Prescription model instance
+    :param change:      1 for a created record, -1 for a deleted record
+    :return:            None
+    """
+
+    field_name = COUNTED_MODELS[type(instance)]
+    medical_records = MedicalRecord.objects.filter(pk=instance.medical_record_id)
+
+    if change < 0:
+        medical_records = medical_records.filter(**{'%s__gte' % field_name: -change})
+
+    logger.info('Changing [%s] of medical record [%s] by [%s]' % (field_name, instance.medical_record_id, change))
+    medical_records.update(**{field_name: F(field_name) + change})
+
+
+def save_medical_record(medical_record):
+    """
+    Function for saving changes to an existing medical record without writing its record counts, so that records
+    created or deleted while the medical record was being edited are still counted.
+    :param medical_record:  MedicalRecord model instance
+    :return:                None
+    """
+
+    update_fields = [field.name for field in MedicalRecord._meta.concrete_fields
+                     if not field.primary_key and field.name not in COUNTED_MODELS.values()]
+    medical_record.save(update_fields=update_fields)
+
+
+def rebuild_record_counts():
+    """
+    Function for setting the record counts of every medical record from the records themselves, with one UPDATE for
+    each record type.
+    :return:    None
+    """
+
+    log_start_time()
+
+    for model, field_name in COUNTED_MODELS.items():
+        logger.info('Rebuilding [%s] of all medical records' % field_name)
+        record_count = model.objects.filter(medical_record=OuterRef('pk')).order_by().values(
+            'medical_record').annotate(record_count=Count('id')).values('record_count')
+        MedicalRecord.objects.update(**{field_name: Coalesce(Subquery(record_count, output_field=IntegerField()),
+                                                             Value(0))})
+
+    log_end_time()
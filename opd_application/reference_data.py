@@ -0,0 +1,301 @@
+# from python library
+import bisect
+import logging
+import threading
+import time
+
+# from third-party applications
+from django.db import transaction
+
+# from main application
+from opd_application.caches import get_cache_version, bump_cache_version
+from opd_application.constants import REFERENCE_DATA_VERSION_NAME, REFERENCE_DATA_CHECK_INTERVAL
+from opd_application.functions import log_start_time, log_end_time
+from opd_application.models.diagnosis_models import DiagnosisCategory, DiagnosisCategoryChoice
+from opd_application.models.laboratory_models import LaboratoryTest, LaboratoryMeasurementUnit, LaboratoryTestDetail, \
+    LaboratoryTestDetailChoice
+from opd_application.models.medical_history_models import MedicalHistoryCategory, MedicalHistoryCategoryUnit, \
+    MedicalHistoryCategoryDetail
+from opd_application.models.models import Dosage, Package, Frequency, DesignatedTime
+from opd_application.models.physical_exam_models import PhysicalExamKey, EENTChoice, LungChoice, RateChoice, \
+    RhythmChoice, AbdomenChoice, ExtremitiesChoice
+from opd_application.models.prescription_models import Medicine
+
+logger = logging.getLogger(__name__)
+
+# lookup tables edited only through the admin site, with the relations retrieved together with each row
+REFERENCE_MODELS = {
+    DiagnosisCategory: [],
+    DiagnosisCategoryChoice: ['diagnosis_category'],
+    LaboratoryTest: [],
+    LaboratoryMeasurementUnit: [],
+    LaboratoryTestDetail: ['laboratory_test', 'laboratory_measurement_unit'],
+    LaboratoryTestDetailChoice: ['laboratory_test_detail__laboratory_test',
+                                 'laboratory_test_detail__laboratory_measurement_unit'],
+    MedicalHistoryCategory: [],
+    MedicalHistoryCategoryUnit: [],
+    MedicalHistoryCategoryDetail: ['medical_history_category', 'medical_history_category_unit'],
+    Medicine: [],
+    Dosage: [],
+    Package: [],
+    Frequency: [],
+    DesignatedTime: [],
+    PhysicalExamKey: [],
+    EENTChoice: [],
+    LungChoice: [],
+    RateChoice: [],
+    RhythmChoice: [],
+    AbdomenChoice: [],
+    ExtremitiesChoice: [],
+}
+
+
+class ReferenceTable(object):
+    """
+    All rows of a reference model, retrieved with a single query. Sorted lists and groups are built on first use and
+    kept with the rows. Rows are shared by every request of the process and must not be modified.
+    :param model:   model class
+    :param related: relations retrieved together with each row
+    """
+
+    def __init__(self, model, related):
+        self.model = model
+        self.records = list(model.objects.select_related(*related).order_by('id'))
+        self.records_by_id = {record.id: record for record in self.records}
+        self.sorted_records = {}
+        self.groups = {}
+        self.indexes = {}
+        self.word_indexes = {}
+
+    def get(self, record_id):
+        return self.records_by_id.get(int(record_id))
+
+    def sort(self, ordering):
+        """
+        Retrieves rows sorted by field values, ties are kept in id order.
+        :param ordering:    tuple of field names
+        :return:            list of model instances
+        """
+
+        if ordering not in self.sorted_records:
+            self.sorted_records[ordering] = sorted(
+                self.records, key=lambda record: [getattr(record, field_name) for field_name in ordering])
+
+        return self.sorted_records[ordering]
+
+    def group(self, field_name, ordering):
+        """
+        Retrieves rows grouped by the value of a foreign key.
+        :param field_name:  foreign key field name
+        :param ordering:    tuple of field names used for sorting each group
+        :return:            dictionary of related id to list of model instances
+        """
+
+        key = (field_name, ordering)
+
+        if key not in self.groups:
+            groups = {}
+            for record in self.sort(ordering):
+                groups.setdefault(getattr(record, '%s_id' % field_name), []).append(record)
+            self.groups[key] = groups
+
+        return self.groups[key]
+
+    def index(self, field_name):
+        """
+        Retrieves rows keyed by the case-folded text of a field, the row with the lowest id is kept for repeated values.
+        :param field_name:  field name
+        :return:            dictionary of case-folded field value to model instance
+        """
+
+        if field_name not in self.indexes:
+            index = {}
+            for record in self.records:
+                index.setdefault(str(getattr(record, field_name)).casefold(), record)
+            self.indexes[field_name] = index
+
+        return self.indexes[field_name]
+
+    def search(self, field_name, search_param):
+        """
+        Retrieves rows having a word in a field for every word of the search parameter to start with. Words of the field
+        are kept case-folded in a sorted list, so rows matching the first word are found by binary search.
+        :param field_name:      field name
+        :param search_param:    search parameter
+        :return:                list of model instances in id order
+        """
+
+        if field_name not in self.word_indexes:
+            self.word_indexes[field_name] = sorted(
+                (word, record.id) for record in self.records
+                for word in str(getattr(record, field_name)).casefold().split())
+
+        word_index = self.word_indexes[field_name]
+        search_words = search_param.casefold().split()
+
+        if not search_words:
+            return []
+
+        start = bisect.bisect_left(word_index, (search_words[0],))
+        record_ids = set()
+
+        for word, record_id in word_index[start:]:
+            if not word.startswith(search_words[0]):
+                break
+            record_ids.add(record_id)
+
+        records = []
+        for record_id in sorted(record_ids):
+            record = self.records_by_id[record_id]
+            words = str(getattr(record, field_name)).casefold().split()
+
+            if all(any(word.startswith(search_word) for word in words) for search_word in search_words[1:]):
+                records.append(record)
+
+        return records
+
+
+class ReferenceDataCache(object):
+    """
+    In-process cache of reference tables. Each table is retrieved once per process, the first time it is needed. Saves
+    and deletes move the shared REFERENCE_DATA_VERSION_NAME version forward, other processes notice the new version
+    within REFERENCE_DATA_CHECK_INTERVAL seconds and retrieve their tables again.
+    """
+
+    def __init__(self):
+        self.tables = {}
+        self.version = None
+        self.checked_time = 0
+        self.lock = threading.RLock()
+
+    def check_version(self):
+        current_time = time.time()
+
+        if current_time - self.checked_time < REFERENCE_DATA_CHECK_INTERVAL:
+            return
+
+        version = get_cache_version(REFERENCE_DATA_VERSION_NAME)
+        self.checked_time = current_time
+
+        if version != self.version:
+            if self.tables:
+                logger.info('Reference data moved to version [%s], discarding cached tables' % version)
+            self.tables = {}
+            self.version = version
+
+    def get_table(self, model):
+        """
+        Retrieves cached table of a reference model, querying the database if it is not cached yet.
+        :param model:   model class
+        :raises:        KeyError if model is not a reference model
+        :return:        ReferenceTable instance
+        """
+
+        related = REFERENCE_MODELS[model]
+
+        with self.lock:
+            self.check_version()
+            table = self.tables.get(model)
+
+            if table is None:
+                log_start_time()
+                logger.info('Caching reference table [%s]' % model._meta.label)
+                table = ReferenceTable(model, related)
+                self.tables[model] = table
+                log_end_time()
+
+        return table
+
+    def get_version(self):
+        with self.lock:
+            self.check_version()
+            return self.version
+
+    def clear(self):
+        with self.lock:
+            self.tables = {}
+            self.checked_time = 0
+
+
+reference_data = ReferenceDataCache()
+
+
+def get_reference_records(model, *ordering):
+    """
+    Function for retrieving all rows of a reference model from the reference data cache.
+    :param model:       model class
+    :param ordering:    field names used for sorting, id order if not given
+    :return:            list of model instances
+    """
+
+    table = reference_data.get_table(model)
+
+    return table.sort(ordering) if ordering else table.records
+
+
+def get_reference_record(model, record_id):
+    """
+    Function for retrieving a row of a reference model from the reference data cache.
+    :param model:       model class
+    :param record_id:   primary key value
+    :return:            model instance, None if not found
+    """
+
+    return reference_data.get_table(model).get(record_id)
+
+
+def get_reference_groups(model, field_name, *ordering):
+    """
+    Function for retrieving rows of a reference model grouped by a foreign key, e.g. choices of each category.
+    :param model:       model class
+    :param field_name:  foreign key field name
+    :param ordering:    field names used for sorting each group
+    :return:            dictionary of related id to list of model instances
+    """
+
+    return reference_data.get_table(model).group(field_name, ordering)
+
+
+def get_reference_data_version():
+    """
+    Function for retrieving the version of reference data, for caching values built from reference tables.
+    :return:    version number
+    """
+
+    return reference_data.get_version()
+
+
+def get_reference_index(model, field_name):
+    """
+    Function for retrieving rows of a reference model keyed by the case-folded text of a field, for case-insensitive
+    lookups such as [key_value__iexact] without a query.
+    :param model:       model class
+    :param field_name:  field name
+    :return:            dictionary of case-folded field value to model instance
+    """
+
+    return reference_data.get_table(model).index(field_name)
+
+
+def search_reference_records(model, field_name, search_param):
+    """
+    Function for retrieving rows of a reference model having a word in a field for every word of the search parameter to
+    start with, e.g. [amox 500] finds [Amoxicillin 500mg]. Case-insensitive, runs without a query.
+    :param model:           model class
+    :param field_name:      field name
+    :param search_param:    search parameter
+    :return:                list of model instances in id order
+    """
+
+    return reference_data.get_table(model).search(field_name, search_param)
+
+
+def invalidate_reference_data():
+    """
+    Function for discarding cached reference tables of every process. The shared version is moved forward once the
+    current transaction is committed so that other processes do not cache rows that are not visible yet.
+    :return:    None
+    """
+
+    reference_data.clear()
+    transaction.on_commit(lambda: bump_cache_version(REFERENCE_DATA_VERSION_NAME))
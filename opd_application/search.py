@@ -0,0 +1,383 @@
+# from python library
+import collections
+import logging
+import re
+import unicodedata
+
+# from third-party applications
+from django.db.models import Count, Q
+from django.db.transaction import atomic
+
+# from main application
+from opd_application.caches import LRUCache, get_cache_version
+from opd_application.constants import SEARCH_TOKEN_LENGTH, PHONETIC_KEY_LENGTH, AUTOCOMPLETE_MIN_LENGTH, \
+    AUTOCOMPLETE_MAX_RESULTS, AUTOCOMPLETE_CACHE_SIZE, PATIENT_CACHE_VERSION_NAME, DATE_SEARCH_TYPE, \
+    UNIFIED_SEARCH_MAX_RESULTS, PAGE_ICONS
+from opd_application.date_search import parse_date_search, create_datetime_range
+from opd_application.functions import log_start_time, log_end_time
+from opd_application.models.diagnosis_models import Diagnosis
+from opd_application.models.laboratory_models import Laboratory
+from opd_application.models.medical_record_models import MedicalRecord
+from opd_application.models.patient_models import Patient
+from opd_application.models.physical_exam_models import PhysicalExam
+from opd_application.models.prescription_models import Medicine, Prescription
+from opd_application.models.search_models import PatientSearchToken, SearchDocument
+from opd_application.reference_data import search_reference_records
+
+logger = logging.getLogger(__name__)
+
+# patient name fields and the token field value used for each in the search index
+PATIENT_INDEXED_FIELDS = {
+    'last_name': PatientSearchToken.LAST_NAME,
+    'first_name': PatientSearchToken.FIRST_NAME,
+}
+
+# record models and the search document record type used for each
+SEARCH_DOCUMENT_TYPES = {
+    Patient: SearchDocument.PATIENT,
+    MedicalRecord: SearchDocument.MEDICAL_RECORD,
+    PhysicalExam: SearchDocument.PHYSICAL_EXAM,
+    Laboratory: SearchDocument.LABORATORY,
+    Diagnosis: SearchDocument.DIAGNOSIS,
+    Prescription: SearchDocument.PRESCRIPTION,
+}
+
+# search document fields matched by each name search type
+SEARCH_DOCUMENT_NAME_LOOKUPS = {
+    '1': 'patient_last_name__startswith',
+    '2': 'encoder_last_name__startswith',
+}
+
+# recent patient name suggestions, keys contain the patient cache version so that saved patients are never missed
+patient_suggestions = LRUCache(AUTOCOMPLETE_CACHE_SIZE)
+
+# spelling rules applied in order, each letter group is replaced by the sound it has in Spanish and Filipino names
+# [J] stands for the Spanish j sound and [0] for ch, sh and ts sounds
+PHONETIC_RULES = [
+    (r'PH', 'F'),
+    (r'GU(?=[EI])', 'K'),
+    (r'QU', 'K'),
+    (r'(CH|SH|TS)', '0'),
+    (r'C(?=[EIY])', 'S'),
+    (r'G(?=[EIY])', 'J'),
+    (r'^X', 'J'),
+    (r'X', 'KS'),
+    (r'[CQG]', 'K'),
+    (r'Z', 'S'),
+    (r'V', 'B'),
+    (r'W', 'U'),
+    (r'Y', 'I'),
+    (r'H', ''),
+]
+
+
+def normalise_search_text(value):
+    """
+    Function for converting text to the form stored in the search index. Text is lowercased and accents are removed so
+    that names like [Peña] and [Pena] produce the same tokens.
+    :param value:   text to be normalised
+    :return:        normalised text
+    """
+
+    decomposed = unicodedata.normalize('NFKD', str(value or '').strip().lower())
+
+    return ''.join(character for character in decomposed if not unicodedata.combining(character))
+
+
+def create_search_tokens(value):
+    """
+    Function for splitting text into the set of trigrams stored in the search index.
+    :param value:   text to be tokenised
+    :return:        set of trigrams, empty if text is shorter than a trigram
+    """
+
+    text = normalise_search_text(value)
+
+    return {text[idx:idx + SEARCH_TOKEN_LENGTH] for idx in range(len(text) - SEARCH_TOKEN_LENGTH + 1)}
+
+
+def create_phonetic_key(value):
+    """
+    Function for converting a name into a key shared by names that sound alike, so that misspelled names like
+    [Gonzales], [Gonzalez] and [Gonsales] can be matched by an exact lookup. Repeated sounds are written once and
+    vowels after the first letter are dropped.
+    :param value:   name to be converted
+    :return:        phonetic key, blank if name has no letters
+    """
+
+    text = normalise_search_text(str(value or '').replace('ñ', 'ny').replace('Ñ', 'NY')).upper()
+    text = re.sub(r'[^A-Z]', '', text)
+
+    for pattern, replacement in PHONETIC_RULES:
+        text = re.sub(pattern, replacement, text)
+
+    if not text:
+        return ''
+
+    text = re.sub(r'(.)\1+', r'\1', text)
+    key = ('A' if text[0] in 'AEIOU' else text[0]) + re.sub(r'[AEIOU]', '', text[1:])
+
+    return key[:PHONETIC_KEY_LENGTH]
+
+
+def set_phonetic_keys(patient):
+    """
+    Function for updating the phonetic keys of a patient from current name values. Does not save the patient.
+    :param patient: Patient model instance
+    :return:        None
+    """
+
+    patient.last_name_phonetic = create_phonetic_key(patient.last_name)
+    patient.first_name_phonetic = create_phonetic_key(patient.first_name)
+
+
+def filter_by_phonetic_name(query_set, search_param):
+    """
+    Function for filtering patients whose name sounds like the search parameter. A parameter in [last name, first name]
+    form matches both names, otherwise only the last name is matched. Names without letters are not matched, so a
+    parameter with no letters matches no patients instead of every patient with a blank key.
+    :param query_set:       Patient QuerySet to be filtered
+    :param search_param:    search parameter
+    :return:                filtered QuerySet
+    """
+
+    last_name, separator, first_name = search_param.partition(',')
+    name_lookup = {}
+
+    if create_phonetic_key(last_name):
+        name_lookup['last_name_phonetic'] = create_phonetic_key(last_name)
+
+    if create_phonetic_key(first_name):
+        name_lookup['first_name_phonetic'] = create_phonetic_key(first_name)
+
+    if not name_lookup:
+        logger.info('Search parameter [%s] has no phonetic key' % search_param)
+        return query_set.none()
+
+    logger.info('Searching patients using phonetic keys [%s]' % name_lookup)
+
+    return query_set.filter(**name_lookup)
+
+
+def index_patient(patient):
+    """
+    Function for replacing the search tokens of a patient with tokens from current name values.
+    :param patient: Patient model instance
+    :return:        None
+    """
+
+    log_start_time()
+
+    search_tokens = []
+
+    for field_name, field in PATIENT_INDEXED_FIELDS.items():
+        for token in create_search_tokens(getattr(patient, field_name)):
+            search_tokens.append(PatientSearchToken(patient=patient, field=field, token=token))
+
+    with atomic():
+        logger.info('Replacing search tokens of patient [%s]' % patient.id)
+        PatientSearchToken.objects.filter(patient=patient).delete()
+        PatientSearchToken.objects.bulk_create(search_tokens)
+
+    log_end_time()
+
+
+def find_indexed_patients(field_name, search_param):
+    """
+    Function for retrieving ids of patients whose name contains all trigrams of the search parameter. Returned value is
+    a lazy query that can be used as a subquery.
+    :param field_name:      patient name field to be searched
+    :param search_param:    search parameter
+    :return:                ValuesQuerySet of patient ids, None if search parameter cannot be tokenised
+    """
+
+    search_tokens = create_search_tokens(search_param)
+
+    if not search_tokens:
+        logger.info('Search parameter [%s] is too short for the search index' % search_param)
+        return None
+
+    return PatientSearchToken.objects.filter(field=PATIENT_INDEXED_FIELDS[field_name],
+                                             token__in=search_tokens).values('patient').annotate(
+        matched_tokens=Count('token', distinct=True)).filter(matched_tokens=len(search_tokens)).values('patient')
+
+
+def filter_by_patient_name(query_set, field_name, search_param, patient_path=''):
+    """
+    Function for filtering records by a part of the related patient's name. Uses the search index to limit candidate
+    records before the substring match is applied. Falls back to a plain substring match if the search parameter is
+    too short for the search index.
+    :param query_set:       QuerySet to be filtered
+    :param field_name:      patient name field to be searched
+    :param search_param:    search parameter
+    :param patient_path:    lookup path from queried model to Patient, blank if Patient is queried
+    :return:                filtered QuerySet
+    """
+
+    patient_ids = find_indexed_patients(field_name, search_param)
+    name_lookup = {'%s%s__icontains' % (patient_path, field_name): search_param}
+
+    if patient_ids is None:
+        return query_set.filter(**name_lookup)
+
+    return query_set.filter(**{'%sid__in' % patient_path: patient_ids}).filter(**name_lookup)
+
+
+def suggest_patients(search_param):
+    """
+    Function for retrieving patients whose last name or first name starts with the search parameter. A parameter in
+    [last name, first name] form must match the start of both names. Only values needed for suggestions are retrieved
+    and results are kept in an in-process cache keyed by the shared patient version, so a patient saved or deleted by
+    any process stops the cached suggestions of every process from being used.
+    :param search_param:    search parameter
+    :return:                list of dictionaries containing id, name and birth date
+    """
+
+    log_start_time()
+
+    search_param = ' '.join(str(search_param or '').split())
+
+    if len(search_param) < AUTOCOMPLETE_MIN_LENGTH:
+        logger.info('Search parameter [%s] is too short for suggestions' % search_param)
+        log_end_time()
+        return []
+
+    cache_key = (get_cache_version(PATIENT_CACHE_VERSION_NAME), search_param.lower())
+    suggestions = patient_suggestions.get(cache_key)
+
+    if suggestions is None:
+        last_name, separator, first_name = [value.strip() for value in search_param.partition(',')]
+
+        if separator:
+            name_filter = Q(last_name__istartswith=last_name, first_name__istartswith=first_name)
+        else:
+            name_filter = Q(last_name__istartswith=last_name) | Q(first_name__istartswith=last_name)
+
+        logger.info('Retrieving patient suggestions for [%s]' % search_param)
+        suggestions = [{'id': patient['id'],
+                        'name': '%s, %s' % (patient['last_name'], patient['first_name']),
+                        'birth_date': patient['birth_date'].isoformat()}
+                       for patient in Patient.objects.filter(name_filter).order_by(
+                           'last_name', 'first_name').values('id', 'last_name', 'first_name', 'birth_date')[
+                                      :AUTOCOMPLETE_MAX_RESULTS]]
+        patient_suggestions.set(cache_key, suggestions)
+    else:
+        logger.info('Using cached patient suggestions for [%s]' % search_param)
+
+    log_end_time()
+    return suggestions
+
+
+def suggest_medicines(search_param):
+    """
+    Function for retrieving medicines having a word in their description for every word of the search parameter to
+    start with. Medicines are searched in the reference data cache, so no query is run.
+    :param search_param:    search parameter
+    :return:                list of dictionaries containing id and description
+    """
+
+    log_start_time()
+
+    search_param = ' '.join(str(search_param or '').split())
+
+    if len(search_param) < AUTOCOMPLETE_MIN_LENGTH:
+        logger.info('Search parameter [%s] is too short for suggestions' % search_param)
+        log_end_time()
+        return []
+
+    logger.info('Retrieving medicine suggestions for [%s]' % search_param)
+    medicines = sorted(search_reference_records(Medicine, 'description', search_param),
+                       key=lambda medicine: (medicine.order, medicine.description))
+    suggestions = [{'id': medicine.id, 'description': medicine.description}
+                   for medicine in medicines[:AUTOCOMPLETE_MAX_RESULTS]]
+
+    log_end_time()
+    return suggestions
+
+
+def create_search_document(instance):
+    """
+    Function for creating the search document of a patient or record. Does not save the search document.
+    :param instance:    Patient, MedicalRecord, PhysicalExam, Laboratory, Diagnosis or Prescription model instance
+    :return:            SearchDocument model instance
+    """
+
+    record_type = SEARCH_DOCUMENT_TYPES[type(instance)]
+
+    if record_type == SearchDocument.PATIENT:
+        patient, encoder, recorded_date = instance, instance.created_by, instance.creation_date
+    elif record_type == SearchDocument.MEDICAL_RECORD:
+        patient, encoder, recorded_date = instance.patient, instance.recorded_by, instance.recorded_date
+    else:
+        patient, encoder, recorded_date = instance.medical_record.patient, instance.recorded_by, instance.recorded_date
+
+    return SearchDocument(record_type=record_type, record_id=instance.id, patient=patient,
+                          patient_name=str(patient).strip(), encoder_name=str(encoder), recorded_date=recorded_date,
+                          patient_last_name=normalise_search_text(patient.last_name),
+                          encoder_last_name=normalise_search_text(encoder.last_name))
+
+
+def index_record(instance):
+    """
+    Function for replacing the search document of a patient or record with one made from current values.
+    :param instance:    Patient, MedicalRecord, PhysicalExam, Laboratory, Diagnosis or Prescription model instance
+    :return:            None
+    """
+
+    log_start_time()
+
+    search_document = create_search_document(instance)
+
+    with atomic():
+        logger.info('Replacing search document of [%s] [%s]' % (type(instance).__name__, instance.id))
+        SearchDocument.objects.filter(record_type=search_document.record_type, record_id=instance.id).delete()
+        search_document.save()
+
+        if search_document.record_type == SearchDocument.PATIENT:
+            logger.info('Updating patient name in search documents of records of patient [%s]' % instance.id)
+            SearchDocument.objects.filter(patient=instance).update(patient_name=search_document.patient_name,
+                                                                   patient_last_name=search_document.patient_last_name)
+
+    log_end_time()
+
+
+def unindex_record(instance):
+    """
+    Function for removing the search document of a deleted patient or record.
+    :param instance:    Patient, MedicalRecord, PhysicalExam, Laboratory, Diagnosis or Prescription model instance
+    :return:            None
+    """
+
+    logger.info('Removing search document of [%s] [%s]' % (type(instance).__name__, instance.id))
+    SearchDocument.objects.filter(record_type=SEARCH_DOCUMENT_TYPES[type(instance)], record_id=instance.id).delete()
+
+
+def find_search_documents(search_type, search_param):
+    """
+    Function for searching patients and all record types at once. Patient and encoder names are matched by prefix.
+    Results are retrieved with a single query and grouped by record type.
+    :param search_type:     search type
+    :param search_param:    search parameter
+    :raises:                KeyError if search type is not supported, InvalidDateSearch if date cannot be read
+    :return:                list of record type label, record type icon and search documents, for non-empty groups
+    """
+
+    log_start_time()
+
+    if search_type == DATE_SEARCH_TYPE:
+        document_filter = {'recorded_date__range': create_datetime_range(*parse_date_search(search_param))}
+    else:
+        document_filter = {SEARCH_DOCUMENT_NAME_LOOKUPS[search_type]: normalise_search_text(search_param)}
+
+    logger.info('Searching search documents using [%s]' % document_filter)
+    search_documents = SearchDocument.objects.filter(**document_filter).order_by('-recorded_date')[
+                       :UNIFIED_SEARCH_MAX_RESULTS]
+
+    groups = collections.OrderedDict((record_type, []) for record_type, label in SearchDocument.RECORD_TYPE_CHOICES)
+
+    for search_document in search_documents:
+        groups[search_document.record_type].append(search_document)
+
+    log_end_time()
+    return [(label, PAGE_ICONS[idx], groups[record_type])
+            for idx, (record_type, label) in enumerate(SearchDocument.RECORD_TYPE_CHOICES) if groups[record_type]]
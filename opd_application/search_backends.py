@@ -0,0 +1,219 @@
+# from python library
+import logging
+import re
+
+# from third-party applications
+from django.conf import settings
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+# from main application
+from opd_application.date_search import filter_by_date
+from opd_application.functions import log_start_time, log_end_time
+from opd_application.models.diagnosis_models import Diagnosis
+from opd_application.models.laboratory_models import Laboratory
+from opd_application.models.medical_record_models import MedicalRecord
+from opd_application.models.patient_models import Patient
+from opd_application.models.physical_exam_models import PhysicalExam
+from opd_application.models.prescription_models import Prescription
+from opd_application.search import filter_by_patient_name, filter_by_phonetic_name, normalise_search_text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEARCH_BACKEND = 'opd_application.search_backends.OrmSearchBackend'
+
+# kinds of searchable fields, each kind is matched differently
+NAME_SEARCH = 'name'
+TEXT_SEARCH = 'text'
+DATE_SEARCH = 'date'
+PHONETIC_SEARCH = 'phonetic'
+
+# words shorter than this are not kept by MySQL FULLTEXT indexes (innodb_ft_min_token_size)
+MIN_FULL_TEXT_WORD_LENGTH = 3
+
+PATIENT_FTS_TABLE = 'opd_application_patient_fts'
+
+
+class SearchField(object):
+    """
+    Field searched by a search type of a model.
+    :param name:            field name, lookup path for text searches
+    :param kind:            NAME_SEARCH, TEXT_SEARCH, DATE_SEARCH or PHONETIC_SEARCH
+    :param ordering:        ordering of search results
+    :param patient_path:    lookup path from searched model to Patient, for name searches
+    """
+
+    def __init__(self, name, kind, ordering, patient_path=''):
+        self.name = name
+        self.kind = kind
+        self.ordering = ordering
+        self.patient_path = patient_path
+
+
+class SearchRegistry(object):
+    """
+    Searchable fields of each model, keyed by search type.
+    """
+
+    def __init__(self):
+        self.search_fields = {}
+
+    def register(self, model, search_fields):
+        self.search_fields[model] = search_fields
+
+    def get_search_field(self, model, search_type):
+        """
+        Retrieves field searched by a search type of a model.
+        :param model:       model class
+        :param search_type: search type
+        :raises:            KeyError if model or search type is not registered
+        :return:            SearchField instance
+        """
+
+        return self.search_fields[model][search_type]
+
+
+class SearchBackend(object):
+    """
+    Base search backend. Dates and phonetic keys are searched through their indexed columns by every backend, backends
+    differ in how patient names and other text are matched.
+    """
+
+    def search(self, query_set, search_field, search_param):
+        """
+        Filters QuerySet using search field and search parameter.
+        :param query_set:       QuerySet to be filtered
+        :param search_field:    SearchField instance
+        :param search_param:    search parameter
+        :raises:                InvalidDateSearch
+        :return:                filtered and ordered QuerySet
+        """
+
+        if search_field.kind == DATE_SEARCH:
+            query_set = filter_by_date(query_set, search_field.name, search_param)
+        elif search_field.kind == PHONETIC_SEARCH:
+            query_set = filter_by_phonetic_name(query_set, search_param)
+        elif search_field.kind == NAME_SEARCH:
+            query_set = self.filter_patient_name(query_set, search_field.name, search_param, search_field.patient_path)
+        else:
+            query_set = self.filter_text(query_set, search_field.name, search_param)
+
+        return query_set.order_by(*search_field.ordering)
+
+    def filter_patient_name(self, query_set, field_name, search_param, patient_path):
+        return query_set.filter(**{'%s%s__icontains' % (patient_path, field_name): search_param})
+
+    def filter_text(self, query_set, field_name, search_param):
+        return query_set.filter(**{'%s__icontains' % field_name: search_param})
+
+
+class OrmSearchBackend(SearchBackend):
+    """
+    Search backend that works on every database. Patient names are looked up through the trigram search index.
+    """
+
+    def filter_patient_name(self, query_set, field_name, search_param, patient_path):
+        return filter_by_patient_name(query_set, field_name, search_param, patient_path)
+
+
+class MySQLFullTextSearchBackend(OrmSearchBackend):
+    """
+    Search backend using MySQL FULLTEXT indexes on patient names. Words of the search parameter are matched as word
+    prefixes, e.g. [cru] finds [Dela Cruz]. Parameters with words too short for the index use the trigram search index.
+    """
+
+    def filter_patient_name(self, query_set, field_name, search_param, patient_path):
+        words = re.findall(r'\w+', normalise_search_text(search_param))
+
+        if not words or any(len(word) < MIN_FULL_TEXT_WORD_LENGTH for word in words):
+            logger.info('Search parameter [%s] is too short for FULLTEXT index' % search_param)
+            return super(MySQLFullTextSearchBackend, self).filter_patient_name(query_set, field_name, search_param,
+                                                                               patient_path)
+
+        patient_ids = RawSQL('SELECT id FROM %s WHERE MATCH (%s) AGAINST (%%s IN BOOLEAN MODE)' % (
+            Patient._meta.db_table, field_name), [' '.join('+%s*' % word for word in words)])
+
+        return query_set.filter(**{'%sid__in' % patient_path: patient_ids})
+
+
+class SQLiteFTS5SearchBackend(OrmSearchBackend):
+    """
+    Search backend using an SQLite FTS5 table of patient names. Words of the search parameter are matched as word
+    prefixes, e.g. [cru] finds [Dela Cruz]. Parameters without words use the trigram search index. Requires SQLite
+    compiled with FTS5.
+    """
+
+    def filter_patient_name(self, query_set, field_name, search_param, patient_path):
+        words = re.findall(r'\w+', normalise_search_text(search_param))
+
+        if not words:
+            logger.info('Search parameter [%s] has no words for FTS5 table' % search_param)
+            return super(SQLiteFTS5SearchBackend, self).filter_patient_name(query_set, field_name, search_param,
+                                                                            patient_path)
+
+        match_query = '%s : %s' % (field_name, ' '.join('"%s"*' % word for word in words))
+        patient_ids = RawSQL('SELECT rowid FROM %s WHERE %s MATCH %%s' % (PATIENT_FTS_TABLE, PATIENT_FTS_TABLE),
+                             [match_query])
+
+        return query_set.filter(**{'%sid__in' % patient_path: patient_ids})
+
+
+search_registry = SearchRegistry()
+
+search_registry.register(Patient, {
+    '1': SearchField('last_name', NAME_SEARCH, ['first_name']),
+    '2': SearchField('first_name', NAME_SEARCH, ['last_name']),
+    '3': SearchField('birth_date', DATE_SEARCH, ['last_name']),
+    '4': SearchField('last_name_phonetic', PHONETIC_SEARCH, ['last_name', 'first_name']),
+})
+
+search_registry.register(MedicalRecord, {
+    '1': SearchField('last_name', NAME_SEARCH, ['-recorded_date'], 'patient__'),
+    '2': SearchField('recorded_by__last_name', TEXT_SEARCH, ['-recorded_date']),
+    '3': SearchField('recorded_date', DATE_SEARCH, ['-recorded_date']),
+})
+
+for record_model in [PhysicalExam, Laboratory, Diagnosis, Prescription]:
+    search_registry.register(record_model, {
+        '1': SearchField('last_name', NAME_SEARCH, ['-recorded_date'], 'medical_record__patient__'),
+        '2': SearchField('recorded_by__last_name', TEXT_SEARCH, ['-recorded_date']),
+        '3': SearchField('recorded_date', DATE_SEARCH, ['-recorded_date']),
+    })
+
+search_backend = None
+
+
+def get_search_backend():
+    """
+    Function for retrieving the search backend chosen in the OPD_SEARCH_BACKEND setting.
+    :return:    SearchBackend instance
+    """
+
+    global search_backend
+
+    if search_backend is None:
+        backend_path = getattr(settings, 'OPD_SEARCH_BACKEND', DEFAULT_SEARCH_BACKEND)
+        logger.info('Using search backend [%s]' % backend_path)
+        search_backend = import_string(backend_path)()
+
+    return search_backend
+
+
+def search_records(model, search_type, search_param):
+    """
+    Function for searching records of a model using the registered search field of a search type.
+    :param model:           model class
+    :param search_type:     search type
+    :param search_param:    search parameter
+    :raises:                KeyError if search type is not registered, InvalidDateSearch if date cannot be read
+    :return:                filtered and ordered QuerySet
+    """
+
+    log_start_time()
+
+    search_field = search_registry.get_search_field(model, search_type)
+    logger.info('Searching [%s] field [%s] for [%s]' % (model.__name__, search_field.name, search_param))
+    query_set = get_search_backend().search(model.objects.all(), search_field, search_param)
+
+    log_end_time()
+    return query_set
@@ -0,0 +1,158 @@
+# from python library
+import logging
+
+# from third-party applications
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+# from main application
+from opd_application.caches import bump_cache_version, get_search_result_version_name
+from opd_application.constants import PATIENT_CACHE_VERSION_NAME
+from opd_application.models.diagnosis_models import Diagnosis
+from opd_application.models.laboratory_models import Laboratory
+from opd_application.models.medical_record_models import MedicalRecord
+from opd_application.models.patient_models import Patient
+from opd_application.models.physical_exam_models import PhysicalExam
+from opd_application.models.prescription_models import Prescription
+from opd_application.record_counts import change_record_count
+from opd_application.reference_data import REFERENCE_MODELS, invalidate_reference_data
+from opd_application.search import index_patient, set_phonetic_keys, index_record, unindex_record
+
+logger = logging.getLogger(__name__)
+
+# models listed by search views, all of them can be searched by patient name
+SEARCHED_MODELS = [Patient, MedicalRecord, PhysicalExam, Laboratory, Diagnosis, Prescription]
+
+
+@receiver(pre_save, sender=Patient)
+def update_patient_phonetic_keys(sender, instance, raw=False, **kwargs):
+    """
+    Sets phonetic keys of a patient from current name values before every save.
+    """
+
+    if raw:
+        logger.info('Skipping phonetic key update for fixture loading')
+        return
+
+    set_phonetic_keys(instance)
+
+
+@receiver(post_save, sender=Patient)
+def update_patient_search_index(sender, instance, raw=False, **kwargs):
+    """
+    Rebuilds search tokens of a patient after every save. Deleted patients lose their tokens through cascade.
+    """
+
+    if raw:
+        logger.info('Skipping search index update for fixture loading')
+        return
+
+    index_patient(instance)
+
+
+@receiver(post_save, sender=MedicalRecord)
+@receiver(post_delete, sender=MedicalRecord)
+@receiver(post_save, sender=PhysicalExam)
+@receiver(post_delete, sender=PhysicalExam)
+@receiver(post_save, sender=Laboratory)
+@receiver(post_delete, sender=Laboratory)
+@receiver(post_save, sender=Diagnosis)
+@receiver(post_delete, sender=Diagnosis)
+@receiver(post_save, sender=Prescription)
+@receiver(post_delete, sender=Prescription)
+def invalidate_search_results(sender, **kwargs):
+    """
+    Invalidates cached search results of a record type after every save or delete of one of its records.
+    """
+
+    bump_cache_version(get_search_result_version_name(sender))
+
+
+@receiver(post_save, sender=Patient)
+@receiver(post_delete, sender=Patient)
+def invalidate_patient_caches(sender, **kwargs):
+    """
+    Invalidates cached patient values (e.g. name suggestions) after every save or delete. Cached search results of all
+    record types are invalidated as well, since records are searched by patient name. Versions are moved forward after
+    the patient is written, so a process reading the new version also sees the saved patient.
+    """
+
+    bump_cache_version(PATIENT_CACHE_VERSION_NAME)
+
+    for model in SEARCHED_MODELS:
+        bump_cache_version(get_search_result_version_name(model))
+
+
+@receiver(post_save, sender=Patient)
+@receiver(post_save, sender=MedicalRecord)
+@receiver(post_save, sender=PhysicalExam)
+@receiver(post_save, sender=Laboratory)
+@receiver(post_save, sender=Diagnosis)
+@receiver(post_save, sender=Prescription)
+def update_search_document(sender, instance, raw=False, **kwargs):
+    """
+    Replaces the search document of a patient or record after every save.
+    """
+
+    if raw:
+        logger.info('Skipping search document update for fixture loading')
+        return
+
+    index_record(instance)
+
+
+@receiver(post_delete, sender=Patient)
+@receiver(post_delete, sender=MedicalRecord)
+@receiver(post_delete, sender=PhysicalExam)
+@receiver(post_delete, sender=Laboratory)
+@receiver(post_delete, sender=Diagnosis)
+@receiver(post_delete, sender=Prescription)
+def remove_search_document(sender, instance, **kwargs):
+    """
+    Removes the search document of a patient or record after it is deleted.
+    """
+
+    unindex_record(instance)
+
+
+@receiver(post_save, sender=PhysicalExam)
+@receiver(post_save, sender=Laboratory)
+@receiver(post_save, sender=Diagnosis)
+@receiver(post_save, sender=Prescription)
+def count_created_record(sender, instance, created=False, raw=False, **kwargs):
+    """
+    Adds a created record to the record count of its medical record.
+    """
+
+    if raw:
+        logger.info('Skipping record count update for fixture loading')
+        return
+
+    if created:
+        change_record_count(instance, 1)
+
+
+@receiver(post_delete, sender=PhysicalExam)
+@receiver(post_delete, sender=Laboratory)
+@receiver(post_delete, sender=Diagnosis)
+@receiver(post_delete, sender=Prescription)
+def count_deleted_record(sender, instance, **kwargs):
+    """
+    Removes a deleted record from the record count of its medical record.
+    """
+
+    change_record_count(instance, -1)
+
+
+def invalidate_cached_reference_data(sender, **kwargs):
+    """
+    Discards cached reference tables after every save or delete of a reference record, e.g. through the admin site.
+    """
+
+    logger.info('Reference record of [%s] changed' % sender._meta.label)
+    invalidate_reference_data()
+
+
+for reference_model in REFERENCE_MODELS:
+    post_save.connect(invalidate_cached_reference_data, sender=reference_model)
+    post_delete.connect(invalidate_cached_reference_data, sender=reference_model)
@@ -16,7 +16,7 @@ Including another URLconf
 from django.conf.urls import url
 
 from opd_application.views import patient_views, dashboard_views, medical_record_views, physical_exam_views, \
-    medical_history_views, laboratory_views, diagnosis_views, prescription_views, medication_views
+    medical_history_views, laboratory_views, diagnosis_views, prescription_views, medication_views, search_views
 
 urlpatterns = [
     url(r'^home/$', dashboard_views.DashboardView.as_view(), name='home'),
@@ -36,6 +36,10 @@ urlpatterns = [
     url(r'^search_diagnosis/$', diagnosis_views.DiagnosisSearchListView.as_view(), name='search_diagnosis'),
     url(r'^search_laboratory/$', laboratory_views.LaboratorySearchListView.as_view(), name='search_laboratory'),
     url(r'^search_prescription/$', prescription_views.PrescriptionSearchListView.as_view(), name='search_prescription'),
+    url(r'^search_all/$', search_views.UnifiedSearchView.as_view(), name='search_all'),
+    url(r'^autocomplete_patient/$', patient_views.PatientAutocompleteView.as_view(), name='autocomplete_patient'),
+    url(r'^autocomplete_medicine/$', prescription_views.MedicineAutocompleteView.as_view(),
+        name='autocomplete_medicine'),
 
     url(r'^profile/(?P<id>[0-9]+)/$', patient_views.PatientProfileDetailView.as_view(), name='profile'),
     url(r'^medical/(?P<id>[0-9]+)/$', medical_record_views.MedicalRecordDetailView.as_view(), name='medical'),
@@ -11,7 +11,7 @@ from django.views.generic import TemplateView
 # from main application
 from opd_application.constants import DASHBOARD_PAGE_NAME, DASHBOARD_TEMPLATE, DEFAULT_SEARCH_CATEGORY, LIST_OFFSET, \
     LOGIN_PAGE_NAME, PAGE_ICONS, PAGE_LABELS, PATIENT_SEARCH_TYPE_LABEL, GENERAL_SEARCH_TYPE_LABEL, SEARCH_VIEW_LINKS, \
-    PATIENT_FORM_PAGE_NAME
+    PATIENT_FORM_PAGE_NAME, PATIENT_AUTOCOMPLETE_PAGE_NAME
 from opd_application.forms.general_forms import GeneralSearchForm
 from opd_application.functions import log_start_time, log_end_time
 from opd_application.constants import DEFAULT_SEARCH_TYPE
@@ -63,6 +63,7 @@ class DashboardView(TemplateView):
                           'search_category': int(search_category),
                           'search_type_labels': search_type_labels,
                           'add_link': reverse_lazy(PATIENT_FORM_PAGE_NAME),
+                          'autocomplete_link': reverse_lazy(PATIENT_AUTOCOMPLETE_PAGE_NAME),
                           'search_category_param': '?search_category='})
 
     @method_decorator(login_required(login_url=LOGIN_PAGE_NAME))
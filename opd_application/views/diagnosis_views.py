@@ -5,7 +5,6 @@ import logging
 from django.db.transaction import atomic
 from django.contrib.auth.decorators import login_required
 from django.core.urlresolvers import reverse_lazy
-from django.forms import formset_factory
 from django.http import HttpResponseRedirect
 from django.shortcuts import render, redirect
 from django.utils.decorators import method_decorator
@@ -13,15 +12,19 @@ from django.utils.timezone import localtime, now
 from django.views.generic import FormView, DetailView
 
 # from main application
+from opd_application.bulk_writes import DiagnosisEntryWriter
 from opd_application.constants import DASHBOARD_PAGE_NAME, DIAGNOSIS_FORM_TEMPLATE, LOGIN_PAGE_NAME, \
     DIAGNOSIS_PROFILE_TEMPLATE, DIAGNOSIS_EDIT_PAGE_NAME, DIAGNOSIS_LIST_TEMPLATE, DIAGNOSIS_FORM_PAGE_NAME, \
     DIAGNOSIS_PAGE_ICON, LABORATORY_LIST_PAGE_NAME, PRESCRIPTION_LIST_PAGE_NAME, LABORATORY_PAGE_ICON, \
     PRESCRIPTION_PAGE_ICON, DIAGNOSIS_LIST_PAGE_NAME, GENERAL_SEARCH_TYPE_LABEL, DIAGNOSIS_SEARCH_PAGE_NAME, \
     DIAGNOSIS_SEARCH_LIST_TEMPLATE
-from opd_application.forms.diagnosis_forms import DiagnosisEntryForm
+from opd_application.forms.diagnosis_forms import DiagnosisEntryForm, BaseDiagnosisEntryFormSet
+from opd_application.forms.general_forms import RegisteredFormSet, render_blank_formset
 from opd_application.models.diagnosis_models import DiagnosisCategory, Diagnosis, DiagnosisEntry
 from opd_application.models.medical_record_models import MedicalRecord
 from opd_application.functions import log_end_time, log_start_time, log_enter_atomic_trans, log_exit_atomic_trans
+from opd_application.loaders import load_entries_per_key
+from opd_application.reference_data import get_reference_records
 from opd_application.views.general_views import GeneralListView, GeneralSearchListView
 
 logger = logging.getLogger(__name__)
@@ -36,8 +39,7 @@ class DiagnosisFormView(FormView):
     form_class = DiagnosisEntryForm
     template_name = DIAGNOSIS_FORM_TEMPLATE
 
-    diagnosis_category_count = DiagnosisCategory.objects.count()
-    DiagnosisFormSet = formset_factory(form_class, max_num=diagnosis_category_count)
+    DiagnosisFormSet = RegisteredFormSet(form_class, DiagnosisCategory, formset=BaseDiagnosisEntryFormSet)
 
     def get(self, request, *args, **kwargs):
         """
@@ -55,7 +57,7 @@ class DiagnosisFormView(FormView):
         initial = []
 
         logger.info('Retrieving diagnosis categories for form creation')
-        diagnosis_categories = DiagnosisCategory.objects.all()
+        diagnosis_categories = get_reference_records(DiagnosisCategory)
 
         logger.info('Retrieving medical record ID from request URI')
         medical_record_id = request.GET.get('medical')
@@ -72,10 +74,11 @@ class DiagnosisFormView(FormView):
                 initial.append({'diagnosis_category': category,
                                 'value': '', })
 
-            formset = self.DiagnosisFormSet(initial=initial)
+            formset_html = render_blank_formset(self.template_name, lambda: self.DiagnosisFormSet(initial=initial))
 
             response = render(request, self.template_name,
-                              {'formset': formset, 'medical_record': medical_record, 'submit_label': 'Record'})
+                              {'formset_html': formset_html, 'medical_record': medical_record,
+                               'submit_label': 'Record'})
         elif diagnosis_id:
             logger.info('Retrieved diagnosis record ID value [%s]' % diagnosis_id)
             diagnosis = Diagnosis.objects.get(pk=diagnosis_id)
@@ -147,35 +150,7 @@ class DiagnosisFormView(FormView):
 
             with atomic():
                 log_enter_atomic_trans()
-                for idx, form in enumerate(formset):
-                    if diagnosis_id:
-                        logger.info(
-                            'Retrieving latest diagnosis entry for diagnosis record [%s] and diagnosis category [%s]' % (
-                                diagnosis_id, form.instance.diagnosis_category))
-                        diagnosis_entry = DiagnosisEntry.objects.filter(diagnosis=diagnosis,
-                                                                        diagnosis_category=form.instance.diagnosis_category).order_by(
-                            '-id').first()
-                    else:
-                        logger.info(
-                            'Creating latest diagnosis entry for diagnosis record [%s] and diagnosis category [%s]' % (
-                                diagnosis_id, form.instance.diagnosis_category))
-                        diagnosis_entry = form.save(commit=False)
-
-                    if diagnosis_entry and diagnosis_entry.value:
-                        if diagnosis_id:
-                            logger.info('Updating details of diagnosis entry')
-                            diagnosis_entry.value = form.instance.value
-                            diagnosis_entry.remark = form.instance.remark
-                        else:
-                            logger.info('Saving details of new diagnosis entry')
-                            diagnosis.save()
-                            diagnosis_entry.diagnosis = diagnosis
-
-                        diagnosis_entry.recorded_by = request.user
-                        diagnosis_entry.recorded_date = localtime(now())
-                        diagnosis_entry.save()
-                    else:
-                        logger.info('Value for [%s] is empty')
+                DiagnosisEntryWriter().save(diagnosis, formset, request.user)
             log_exit_atomic_trans()
 
             logger.info('Redirecting to diagnosis profile page')
@@ -203,9 +178,9 @@ class DiagnosisDetailView(DetailView):
 
     def get(self, request, *args, **kwargs):
         """
-        Retrieves diagnosis category records from database. These categories will be used to fetch records for
-        patient's diagnosis record. Categories will be used to group and order diagnosis entry records within a zip
-        list.
+        Retrieves diagnosis entry records of patient's diagnosis record with a single query. Diagnosis categories are
+        used to group and order diagnosis entry records within a zip list, the first entry is displayed for a category
+        with more than one entry.
         :param request: HttpRequest
         :param args:    variable arguments
         :param kwargs:  named arguments
@@ -214,30 +189,18 @@ class DiagnosisDetailView(DetailView):
 
         log_start_time()
 
-        category_list = []
-        diagnosis_entry_per_category_list = []
-
         logger.info('Retrieving diagnosis id from request URI')
-        diagnosis = self.model.objects.get(pk=kwargs.get('id'))
-        diagnosis_categories = DiagnosisCategory.objects.all().order_by('order')
+        diagnosis = self.model.objects.select_related('medical_record__patient', 'recorded_by').get(pk=kwargs.get('id'))
 
-        for category in diagnosis_categories:
-            logger.info('Retrieving diagnosis entry records for category [%s]' % category)
-            category_list.append(category)
-            diagnosis_entry = DiagnosisEntry.objects.filter(diagnosis=diagnosis, diagnosis_category=category)
+        logger.info('Retrieving diagnosis entry records grouped by category')
+        category_entries = load_entries_per_key(DiagnosisEntry.objects.filter(diagnosis=diagnosis),
+                                                'diagnosis_category', get_reference_records(DiagnosisCategory, 'order'))
 
-            if diagnosis_entry.count() > 1:
+        for category, entries in category_entries:
+            if len(entries) > 1:
                 logger.warn('Diagnosis entry count is greater than expected for category [%s]' % category)
-                logger.info('Defaulting to first retrieved item')
-                diagnosis_entry_per_category_list.append(diagnosis_entry.first())
-            elif diagnosis_entry.count() < 1:
-                logger.info('No related diagnosis entry for category [%s]' % category)
-                diagnosis_entry_per_category_list.append(None)
-            else:
-                logger.info('Successful diagnosis entry retrieval for category [%s]' % category)
-                diagnosis_entry_per_category_list.append(diagnosis_entry.last())
 
-        category_entry_zip = zip(category_list, diagnosis_entry_per_category_list)
+        category_entry_zip = [(category, entries[0] if entries else None) for category, entries in category_entries]
 
         log_end_time()
         return render(request, self.template_name,
@@ -14,26 +14,96 @@ from django.views.generic import ListView
 # from main application
 from opd_application.forms.general_forms import GeneralSearchForm
 from opd_application.constants import MAX_LIST_ITEMS_PER_PAGE, MAX_PAGINATE_NUMBER, DEFAULT_SEARCH_TYPE, \
-    DASHBOARD_PAGE_NAME, LOGIN_PAGE_NAME, MEDICAL_RECORD_PAGE_ICON
+    DASHBOARD_PAGE_NAME, LOGIN_PAGE_NAME, MEDICAL_RECORD_PAGE_ICON, PAGINATION_MODE_OFFSET, PAGINATION_MODE_KEYSET, \
+    COUNT_STRATEGY_EXACT, COUNT_STRATEGY_CAPPED, COUNT_STRATEGY_ESTIMATE
 from opd_application.models.patient_models import Patient
 from opd_application.models.medical_record_models import MedicalRecord
 from opd_application.messages import EMPTY_SEARCH_RESULT, INVALID_SEARCH_TYPE, INVALID_SEARCH_PARAMETER_VALUE
 from opd_application.functions import log_start_time, log_end_time
+from opd_application.counting import CountedPaginator, UncountedPaginator, count_results, is_exact_count
+from opd_application.caches import CachedResultList, cache_search_results
+from opd_application.pagination import KeysetPaginator, InvalidCursor
+from opd_application.search_backends import search_records
+from opd_application.date_search import InvalidDateSearch
 
 logger = logging.getLogger(__name__)
 
 DISABLED_LINK_CLASS = 'disabled'
 PAGE_PARAMETER_SUFFIX = '&page='
+CURSOR_PARAMETER_SUFFIX = '&cursor='
+
+
+def create_paginator(query_set, pagination_mode, search_count=None, is_exact=True):
+    """
+    Function for creating a paginator for the given pagination mode.
+    :param query_set:       QuerySet to be paginated
+    :param pagination_mode: PAGINATION_MODE_OFFSET or PAGINATION_MODE_KEYSET
+    :param search_count:    already computed number of results, reused by offset pagination instead of counting again
+    :param is_exact:        False if search_count is capped or estimated and cannot be used for numbering pages
+    :return:                Paginator, CountedPaginator, UncountedPaginator or KeysetPaginator instance
+    """
+
+    if pagination_mode == PAGINATION_MODE_KEYSET:
+        logger.info('Using keyset pagination')
+        return KeysetPaginator(query_set, MAX_LIST_ITEMS_PER_PAGE)
+    elif not is_exact:
+        logger.info('Using offset pagination without a total for search count [%s]' % search_count)
+        return UncountedPaginator(query_set, MAX_LIST_ITEMS_PER_PAGE)
+    elif search_count is not None:
+        logger.info('Using offset pagination with search count [%s]' % search_count)
+        return CountedPaginator(query_set, MAX_LIST_ITEMS_PER_PAGE, search_count)
+    else:
+        logger.info('Using offset pagination')
+        return Paginator(query_set, MAX_LIST_ITEMS_PER_PAGE)
+
+
+def modify_cursor_links(view):
+    """
+    Function for setting links and classes for paginator buttons in list view using cursor tokens of current page.
+    Only the current page number is listed since keyset pagination does not know the number of pages.
+    :param view:    View instance
+    :return:        None
+    """
+
+    log_start_time()
+
+    search_link = view.search_link + CURSOR_PARAMETER_SUFFIX
+
+    if view.searches.has_next():
+        logger.info('Current page is followed by another page')
+        view.next_link = search_link + urllib.parse.quote(view.searches.next_cursor)
+        view.next_link_class = ''
+    else:
+        logger.info('Current page is the last page')
+        view.next_link = None
+        view.next_link_class = DISABLED_LINK_CLASS
+
+    if view.searches.has_previous():
+        logger.info('Current page is preceded by another page')
+        view.previous_link = search_link + urllib.parse.quote(view.searches.previous_cursor)
+        view.previous_link_class = ''
+    else:
+        logger.info('Current page is the first page')
+        view.previous_link = None
+        view.previous_link_class = DISABLED_LINK_CLASS
+
+    view.pages = [view.current_page]
+
+    log_end_time()
 
 
 def modify_page_links(view, paginator):
     """
     Function for setting links and classes for paginator buttons in list view.
     :param view:        View instance
-    :param paginator:   Paginator instance
+    :param paginator:   Paginator or KeysetPaginator instance
     :return:            None
     """
 
+    if isinstance(paginator, KeysetPaginator):
+        modify_cursor_links(view)
+        return
+
     log_start_time()
 
     search_link = view.search_link + PAGE_PARAMETER_SUFFIX
@@ -74,6 +144,26 @@ def modify_page_links(view, paginator):
     log_end_time()
 
 
+def apply_projection(view, query_set):
+    """
+    Function for limiting a QuerySet to the fields and related objects displayed by a list view, so that listing a page
+    costs the same number of queries regardless of the number of rows.
+    :param view:        View instance
+    :param query_set:   QuerySet to be limited
+    :return:            QuerySet with projection_related selected and only projection_fields loaded
+    """
+
+    if view.projection_related:
+        logger.info('Selecting related objects [%s]' % view.projection_related)
+        query_set = query_set.select_related(*view.projection_related)
+
+    if view.projection_fields:
+        logger.info('Loading only fields [%s]' % view.projection_fields)
+        query_set = query_set.only(*view.projection_fields)
+
+    return query_set
+
+
 def validate_response(view):
     """
     Function that performs all validation on view instance and sets error messages accordingly
@@ -82,7 +172,9 @@ def validate_response(view):
     """
     log_start_time()
 
-    if view.search_count < 1:
+    if not view.searches and view.error_message:
+        logger.info('Search returned an empty list because of an invalid search')
+    elif not view.searches:
         logger.info('Search returned an emtpy list')
         view.error_message = EMPTY_SEARCH_RESULT
     else:
@@ -91,15 +183,52 @@ def validate_response(view):
     log_end_time()
 
 
+def select_cursor_results(view, request, paginator):
+    """
+    Function for retrieving value of [cursor] parameter in URI.
+    :param view:        View instance
+    :param request:     HttpRequest instance
+    :param paginator:   KeysetPaginator instance
+    :return:            None
+    """
+
+    log_start_time()
+
+    cursor = None
+
+    if request.POST:
+        logger.info('Defaulting to first page because of POST request')
+    elif request.GET.get('cursor'):
+        logger.info('Retrieved value for cursor parameter')
+        cursor = request.GET.get('cursor')
+    else:
+        logger.info('Did not receive cursor parameter')
+
+    try:
+        view.searches = paginator.page(cursor)
+    except InvalidCursor:
+        logger.warn('Provided value for cursor parameter is invalid')
+        view.error_message = INVALID_SEARCH_PARAMETER_VALUE
+        view.searches = paginator.page()
+
+    view.current_page = view.searches.number
+
+    log_end_time()
+
+
 def select_search_results(view, request, paginator):
     """
     Function for retrieving value of [page] parameter in URI.
     :param view:        View instance
     :param request:     HttpRequest instance
-    :param paginator:   Paginator instance
+    :param paginator:   Paginator or KeysetPaginator instance
     :return:            None
     """
 
+    if isinstance(paginator, KeysetPaginator):
+        select_cursor_results(view, request, paginator)
+        return
+
     log_start_time()
 
     if request.POST:
@@ -194,48 +323,30 @@ def initialise_form(view, request):
 
 def search_matches(view, search_type, search_param):
     """
-    Function for retrieving records based on model type and search parameters.
-    :param view:
-    :param search_type:
-    :param search_param:
-    :return:
+    Function for retrieving records based on model type and search parameters. Searched fields are taken from the
+    search registry and matched by the configured search backend.
+    :param view:            View instance
+    :param search_type:     search type
+    :param search_param:    search parameter
+    :return:                QuerySet of matching records, empty if search type or search parameter is invalid
     """
 
     log_start_time()
 
-    query_set = None
-
-    if view.model == Patient:
-        search_query = {
-            '1': view.model.objects.filter(last_name__icontains=search_param).order_by('first_name'),
-            '2': view.model.objects.filter(first_name__icontains=search_param).order_by('last_name'),
-            '3': view.model.objects.filter(birth_date__icontains=search_param).order_by('last_name'),
-        }
-    elif view.model == MedicalRecord:
-        search_query = {
-            '1': view.model.objects.filter(patient__last_name__icontains=search_param).order_by('-recorded_date'),
-            '2': view.model.objects.filter(recorded_by__last_name__icontains=search_param).order_by(
-                '-recorded_date'),
-            '3': view.model.objects.filter(recorded_date__icontains=search_param).order_by('-recorded_date')
-        }
-    else:
-        search_query = {
-            '1': view.model.objects.filter(medical_record__patient__last_name__icontains=search_param).order_by(
-                '-recorded_date'),
-            '2': view.model.objects.filter(recorded_by__last_name__icontains=search_param).order_by(
-                '-recorded_date'),
-            '3': view.model.objects.filter(recorded_date__icontains=search_param).order_by('-recorded_date')
-        }
-
     try:
         logger.info('Retrieving record for model [%s] with search type [%s] and search parameter [%s]' % (
             view.model, search_type, search_param))
-        query_set = search_query.get(search_type)
-        view.search_count = query_set.count()
+        query_set = search_records(view.model, search_type, search_param)
     except KeyError:
         logger.warn('Received invalid search type and search parameter')
         view.error_message = INVALID_SEARCH_TYPE
+        query_set = view.model.objects.none().order_by('-id')
+    except InvalidDateSearch:
+        logger.warn('Received search parameter that is not a date')
+        view.error_message = INVALID_SEARCH_PARAMETER_VALUE
+        query_set = view.model.objects.none().order_by('-id')
 
+    log_end_time()
     return query_set
 
 
@@ -251,10 +362,17 @@ class GeneralListView(ListView):
     error_message = None
     search_link = ''
     search_count = 0
+    search_count_label = None
     next_link = None
     next_link_class = None
     previous_link = None
     previous_link_class = None
+    pagination_mode = PAGINATION_MODE_KEYSET
+    count_strategy = COUNT_STRATEGY_EXACT
+
+    # fields and related objects displayed for each row, all fields are loaded if projection_fields is empty
+    projection_fields = ['id', 'recorded_date', 'recorded_by__username']
+    projection_related = ['recorded_by']
 
     # subclass-supplied properties
     left_link_page_name = None
@@ -313,8 +431,12 @@ class GeneralListView(ListView):
             logger.warn('Did not receive value for required medical parameter')
             return redirect(DASHBOARD_PAGE_NAME, permanent=True)
 
-        paginator = Paginator(result_list, MAX_LIST_ITEMS_PER_PAGE)
-        self.search_count = result_list.count()
+        if self.pagination_mode == PAGINATION_MODE_OFFSET:
+            self.search_count, self.search_count_label = count_results(result_list, self.count_strategy)
+            paginator = create_paginator(apply_projection(self, result_list), self.pagination_mode, self.search_count,
+                                         is_exact_count(self.search_count, self.count_strategy))
+        else:
+            paginator = create_paginator(apply_projection(self, result_list), self.pagination_mode)
 
         logger.info('Calling common functions for listing results')
         select_search_results(self, request, paginator)
@@ -369,6 +491,14 @@ class GeneralSearchListView(GeneralListView):
     search_type = DEFAULT_SEARCH_TYPE
     search_param = ''
     search_labels = {}
+    pagination_mode = PAGINATION_MODE_OFFSET
+    listing_pagination_mode = PAGINATION_MODE_KEYSET
+    count_strategy = COUNT_STRATEGY_CAPPED
+    listing_count_strategy = COUNT_STRATEGY_ESTIMATE
+    cache_results = True
+    projection_fields = ['id', 'recorded_date', 'recorded_by__username', 'medical_record__patient__last_name',
+                         'medical_record__patient__first_name', 'medical_record__patient__middle_name']
+    projection_related = ['recorded_by', 'medical_record__patient']
 
     def process_search(self, request):
         """
@@ -392,11 +522,21 @@ class GeneralSearchListView(GeneralListView):
             if self.search_param:
                 logger.info('Received a non-empty search parameter')
                 results = search_matches(self, self.search_type, self.search_param)
+                if self.cache_results and not self.error_message:
+                    results = cache_search_results(results, self.search_type, self.search_param,
+                                                   apply_projection(self, self.model.objects.all()))
+                self.search_count, self.search_count_label = count_results(results, self.count_strategy)
+                if not isinstance(results, CachedResultList):
+                    results = apply_projection(self, results)
+                paginator = create_paginator(results, self.pagination_mode, self.search_count,
+                                             is_exact_count(self.search_count, self.count_strategy))
             else:
                 logger.info('Did not receive a valid search parameter')
                 results = self.model.objects.all().order_by('-id')
-
-            paginator = Paginator(results, MAX_LIST_ITEMS_PER_PAGE)
+                self.search_count, self.search_count_label = count_results(results, self.listing_count_strategy)
+                paginator = create_paginator(apply_projection(self, results), self.listing_pagination_mode,
+                                             self.search_count,
+                                             is_exact_count(self.search_count, self.listing_count_strategy))
 
             logger.info('Calling common functions for listing records')
             select_search_results(self, request, paginator)
@@ -407,6 +547,7 @@ class GeneralSearchListView(GeneralListView):
                               {'form': form,
                                'search_link': self.search_link,
                                'searches': self.searches,
+                               'search_count_label': self.search_count_label,
                                'search_type_labels': self.search_labels,
                                'act_search_type_label': self.search_labels.get(self.search_type),
                                'pages': self.pages,
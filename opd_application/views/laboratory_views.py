@@ -6,7 +6,6 @@ import urllib.parse
 from django.db.transaction import atomic
 from django.contrib.auth.decorators import login_required
 from django.core.urlresolvers import reverse_lazy
-from django.forms import formset_factory
 from django.http import HttpResponseRedirect
 from django.shortcuts import render, redirect
 from django.utils.decorators import method_decorator
@@ -14,17 +13,22 @@ from django.utils.timezone import localtime, now
 from django.views.generic import FormView, DetailView
 
 # from main application
+from opd_application.bulk_writes import LaboratoryResultWriter
 from opd_application.constants import DASHBOARD_PAGE_NAME, LABORATORY_FORM_TEMPLATE, LOGIN_PAGE_NAME, \
     LABORATORY_PROFILE_TEMPLATE, LABORATORY_LIST_TEMPLATE, PHYSICAL_EXAM_LIST_PAGE_NAME, LABORATORY_FORM_PAGE_NAME, \
     LABORATORY_PAGE_ICON, PHYSICAL_EXAM_PAGE_ICON, LABORATORY_LIST_PAGE_NAME, DIAGNOSIS_LIST_PAGE_NAME, \
     DIAGNOSIS_PAGE_ICON, LABORATORY_SEARCH_LIST_TEMPLATE, LABORATORY_SEARCH_PAGE_NAME, GENERAL_SEARCH_TYPE_LABEL, \
     LABORATORY_EDIT_PAGE_NAME, MEDICAL_RECORD_PROFILE_PAGE_NAME, LABORATORY_TEST_LIST_TEMPLATE, \
     LABORATORY_TEST_LIST_PAGE_NAME
-from opd_application.forms.laboratory_forms import LaboratoryResultForm
+from opd_application.forms.general_forms import RegisteredFormSet, render_blank_formset
+from opd_application.forms.laboratory_forms import LaboratoryResultForm, BaseLaboratoryResultFormSet, \
+    LaboratoryTestSelectionForm
 from opd_application.functions import log_start_time, log_end_time, log_exit_atomic_trans, log_enter_atomic_trans
+from opd_application.loaders import load_laboratory_results_per_test
 from opd_application.models.laboratory_models import LaboratoryTestDetail, Laboratory, LaboratoryResult, LaboratoryTest
 from opd_application.models.medical_record_models import MedicalRecord
 from opd_application.models.patient_models import Patient
+from opd_application.reference_data import get_reference_records, get_reference_groups, get_reference_record
 from opd_application.views.general_views import GeneralListView, GeneralSearchListView
 
 logger = logging.getLogger(__name__)
@@ -39,14 +43,38 @@ class LaboratoryFormView(FormView):
     form_class = LaboratoryResultForm
     template_name = LABORATORY_FORM_TEMPLATE
 
-    model_items = LaboratoryTestDetail.objects.count()
-    LaboratoryFormSet = formset_factory(form_class, max_num=model_items)
+    LaboratoryFormSet = RegisteredFormSet(form_class, LaboratoryTestDetail, formset=BaseLaboratoryResultFormSet)
+
+    def get_initial(self, laboratory_tests, laboratory_results):
+        """
+        Creates initial data of a form for each detail of the ordered laboratory tests
+        :param laboratory_tests:    list of ordered LaboratoryTest model instances
+        :param laboratory_results:  dictionary of laboratory test detail id to current LaboratoryResult model instance
+        :return:                    list of dictionaries of initial form data
+        """
+
+        initial = []
+        test_details_per_test = get_reference_groups(LaboratoryTestDetail, 'laboratory_test', 'order')
+
+        for laboratory_test in laboratory_tests:
+            for test_detail in test_details_per_test.get(laboratory_test.id, []):
+                display = '%s: %s' % (str(test_detail.laboratory_test), test_detail.description)
+
+                if test_detail.laboratory_measurement_unit.is_displayable:
+                    display += ' (%s)' % test_detail.laboratory_measurement_unit
+
+                laboratory_result = laboratory_results.get(test_detail.id)
+                initial.append({'laboratory_test_detail_display': display,
+                                'laboratory_test_detail': test_detail,
+                                'value': laboratory_result.value if laboratory_result else '', })
+
+        return initial
 
     def get(self, request, *args, **kwargs):
         """
-        Retrieves laboratory test detail records from database then creates a formset depending on the
-        number of retrieved rows. Pre-fills patient field using relationship between retrieved value of
-        [medical] argument from URI
+        Creates a formset for the details of the laboratory tests chosen through the laboratory test selection form.
+        For updates, laboratory tests ordered for the laboratory record are chosen unless others are given. Pre-fills
+        patient field using relationship between retrieved value of [medical] argument from URI
         :param request: HttpRequest
         :param args:    variable arguments
         :param kwargs:  named arguments
@@ -55,75 +83,65 @@ class LaboratoryFormView(FormView):
 
         log_start_time()
 
-        initial = []
-
         logger.info('Retrieving medical record ID from request URI')
         medical_record_id = request.GET.get('medical')
         logger.info('Retrieving laboratory record ID from request URI')
         laboratory_id = kwargs.get('id')
 
-        laboratory_test_details = LaboratoryTestDetail.objects.all()
+        if 'laboratory_tests' in request.GET:
+            logger.info('Retrieving chosen laboratory tests from request URI')
+            selection_form = LaboratoryTestSelectionForm(request.GET)
+        else:
+            selection_form = None
 
         if medical_record_id:
             logger.info('Retrieved medical record ID value [%s]' % medical_record_id)
             medical_record = MedicalRecord.objects.get(pk=int(medical_record_id))
+            context = {'medical_record': medical_record, 'submit_label': 'Record'}
+
+            if selection_form and selection_form.is_valid():
+                laboratory_tests = selection_form.cleaned_data['laboratory_tests']
+                context['laboratory_tests'] = laboratory_tests
+                logger.info('Creating formset for laboratory tests [%s]' % laboratory_tests)
+                formset_name = '%s:%s' % (self.template_name, ','.join(str(laboratory_test.id)
+                                                                       for laboratory_test in laboratory_tests))
+                context['formset_html'] = render_blank_formset(
+                    formset_name, lambda: self.LaboratoryFormSet(initial=self.get_initial(laboratory_tests, {})))
+            else:
+                logger.info('No laboratory test was chosen yet')
+                selection_form = selection_form or LaboratoryTestSelectionForm()
 
-            for test_detail in laboratory_test_details:
-                logger.info('Creating display labels for [%s]' % test_detail)
-                display = '%s: %s' % (str(test_detail.laboratory_test), test_detail.description)
-
-                if test_detail.laboratory_measurement_unit.is_displayable:
-                    display += ' (%s)' % test_detail.laboratory_measurement_unit
-
-                logger.info('Created display is [%s]' % display)
-                initial.append({'laboratory_test_detail_display': display,
-                                'laboratory_test_detail': test_detail,
-                                'value': ''})
-
-            formset = self.LaboratoryFormSet(initial=initial)
-            response = render(request, self.template_name,
-                              {'formset': formset, 'medical_record': medical_record, 'submit_label': 'Record'})
+            response = render(request, self.template_name, dict(context, selection_form=selection_form))
         elif laboratory_id:
             logger.info('Retrieved laboratory record ID value [%s]' % laboratory_id)
-            laboratory = Laboratory.objects.get(pk=int(laboratory_id))
+            laboratory = Laboratory.objects.select_related('medical_record__patient').get(pk=int(laboratory_id))
 
-            for test_detail in laboratory_test_details:
-                logger.info(
-                    'Retrieving non-deleted laboratory results for laboratory record [%s] and test detail [%s]' % (
-                        laboratory_id, test_detail))
-                laboratory_result = LaboratoryResult.objects.filter(laboratory=laboratory,
-                                                                    laboratory_test_detail=test_detail,
-                                                                    is_deleted=False)
-                logger.info('Creating display labels for [%s]' % test_detail)
-                display = '%s: %s' % (str(test_detail.laboratory_test), test_detail.description)
+            logger.info('Retrieving current laboratory results')
+            laboratory_results = LaboratoryResultWriter().get_current_entries(laboratory)
 
-                if test_detail.laboratory_measurement_unit.is_displayable:
-                    display += ' (%s)' % test_detail.laboratory_measurement_unit
+            if selection_form and selection_form.is_valid():
+                laboratory_tests = selection_form.cleaned_data['laboratory_tests']
+            else:
+                logger.info('Retrieving laboratory tests ordered for laboratory record')
+                laboratory_test_ids = set(laboratory.ordered_tests.values_list('id', flat=True))
+
+                if not laboratory_test_ids:
+                    logger.info('No ordered laboratory test was saved, using laboratory tests of current results')
+                    laboratory_test_ids = set(
+                        get_reference_record(LaboratoryTestDetail, test_detail_id).laboratory_test_id
+                        for test_detail_id in laboratory_results)
 
-                logger.info('Created display is [%s]' % display)
-
-                if laboratory_result.count() > 1:
-                    logger.warn('Laboratory result count is greater than expected for test detail [%s]' % test_detail)
-                    logger.info('Defaulting to first retrieved item')
-                    initial.append({'laboratory_test_detail_display': display,
-                                    'laboratory_test_detail': laboratory_result.first().laboratory_test_detail,
-                                    'value': laboratory_result.first().value, })
-                elif laboratory_result.count() < 1:
-                    logger.info('No related laboratory result record for test detail [%s]' % test_detail)
-                    initial.append({'laboratory_test_detail_display': display,
-                                    'laboratory_test_detail': test_detail,
-                                    'value': '', })
-                else:
-                    logger.info('Successful laboratory result retrieval for test detail [%s]' % test_detail)
-                    initial.append({'laboratory_test_detail_display': display,
-                                    'laboratory_test_detail': laboratory_result.last().laboratory_test_detail,
-                                    'value': laboratory_result.last().value, })
-
-            formset = self.LaboratoryFormSet(initial=initial)
+                selection_form = LaboratoryTestSelectionForm(initial={'laboratory_tests': sorted(laboratory_test_ids)})
+                laboratory_tests = [laboratory_test
+                                    for laboratory_test in get_reference_records(LaboratoryTest, 'order')
+                                    if laboratory_test.id in laboratory_test_ids]
+
+            formset = self.LaboratoryFormSet(initial=self.get_initial(laboratory_tests, laboratory_results))
 
             response = render(request, self.template_name,
                               {'formset': formset, 'medical_record': laboratory.medical_record,
-                               'submit_label': 'Update', 'laboratory': laboratory})
+                               'submit_label': 'Update', 'laboratory': laboratory, 'selection_form': selection_form,
+                               'laboratory_tests': laboratory_tests})
         else:
             logger.warn('Did not receive value for required patient parameter')
             response = redirect(DASHBOARD_PAGE_NAME, permanent=True)
@@ -134,7 +152,8 @@ class LaboratoryFormView(FormView):
     def post(self, request, *args, **kwargs):
         """
         Validates formset data. Creates a new laboratory record then saves laboratory result records with
-        non-empty value.
+        non-empty value. Ordered laboratory tests are saved with the laboratory record, and results of laboratory tests
+        that are no longer ordered are removed.
         :param request: HttpRequest
         :param args:    variable arguments
         :param kwargs:  named arguments
@@ -162,75 +181,47 @@ class LaboratoryFormView(FormView):
 
         logger.info('Retrieving POST data')
         formset = self.LaboratoryFormSet(request.POST)
+        selection_form = LaboratoryTestSelectionForm(request.POST)
+
+        if laboratory_id:
+            logger.info('Retrieved laboratory record as foreign key for laboratory result records')
+            laboratory = Laboratory.objects.get(pk=int(laboratory_id))
+        else:
+            logger.info('Created laboratory record as foreign key for laboratory result records')
+            laboratory = Laboratory(medical_record=medical_record, recorded_by=request.user,
+                                    recorded_date=localtime(now()))
 
         logger.info('Validating formset values')
-        if formset.is_valid():
+        if selection_form.is_valid() and formset.is_valid():
             logger.info('Received valid formset data')
+            laboratory_tests = selection_form.cleaned_data['laboratory_tests']
 
-            if laboratory_id:
-                logger.info('Retrieved laboratory record as foreign key for laboratory result records')
-                laboratory = Laboratory.objects.get(pk=int(laboratory_id))
-            else:
-                logger.info('Created laboratory record as foreign key for laboratory result records')
-                laboratory = Laboratory(medical_record=medical_record, recorded_by=request.user,
-                                        recorded_date=localtime(now()))
             with atomic():
                 log_enter_atomic_trans()
-                for form in formset:
-                    if laboratory_id:
-                        logger.info(
-                            'Retrieving latest laboratory result for laboratory record [%s] and test detail [%s]' % (
-                                laboratory_id, form.instance.laboratory_test_detail))
-                        laboratory_result = LaboratoryResult.objects.filter(laboratory=laboratory,
-                                                                            laboratory_test_detail=form.instance.laboratory_test_detail,
-                                                                            is_deleted=False).order_by(
-                            '-id').first()
-                    else:
-                        logger.info(
-                            'Creating latest laboratory result for laboratory record [%s] and test detail [%s]' % (
-                                laboratory_id, form.instance.laboratory_test_detail))
-                        laboratory_result = form.save(commit=False)
-
-                    if laboratory_result:
-                        logger.info('Received a non-empty instance for laboratory result')
-                        if laboratory_id and form.instance.value:
-                            if form.instance.value == laboratory_result.value:
-                                logger.info('No change was detected')
-                            else:
-                                logger.info('Updating details of laboratory laboratory')
-                                laboratory_result.value = form.instance.value
-                        elif laboratory_id and not form.instance.value:
-                            logger.info('Removing details of laboratory result')
-                            laboratory_result.is_deleted = True
-                        elif laboratory_result.value:
-                            logger.info('Saving details of new laboratory result for new laboratory record')
-                            laboratory.save()
-                            laboratory_result.laboratory = laboratory
-                        else:
-                            logger.info('Skipping laboratory result for [%s]' % form.instance.laboratory_test_detail)
-                            continue
-                    else:
-                        logger.info('No value for laboratory_result variable. Using value from form')
-                        if form.instance.value:
-                            logger.info('Saving details of new laboratory result for previous laboratory record')
-                            laboratory.save()
-                            laboratory_result = form.save(commit=False)
-                            laboratory_result.laboratory = laboratory
-                        else:
-                            logger.info('Skipping laboratory result for [%s]' % form.instance.laboratory_test_detail)
-                            continue
-
-                    laboratory_result.updated_by = request.user
-                    laboratory_result.updated_date = localtime(now())
-                    laboratory_result.save()
+                LaboratoryResultWriter().save(laboratory, formset, request.user)
+
+                if not laboratory.id:
+                    logger.info('Saving laboratory record without results')
+                    laboratory.save()
 
+                logger.info('Saving ordered laboratory tests [%s]' % laboratory_tests)
+                laboratory.ordered_tests.set(laboratory_tests)
+
+                logger.info('Removing results of laboratory tests that are no longer ordered')
+                LaboratoryResult.objects.filter(laboratory=laboratory, is_deleted=False).exclude(
+                    laboratory_test_detail__laboratory_test__in=laboratory_tests).update(
+                    is_deleted=True, updated_by=request.user, updated_date=localtime(now()))
             log_exit_atomic_trans()
 
             logger.info('Redirecting to laboratory profile page')
             response = redirect(laboratory)
         else:
             logger.warn('Received invalid formset data')
-            response = render(request, self.template_name, {'formset': formset, 'medical_record': medical_record})
+            response = render(request, self.template_name,
+                              {'formset': formset, 'medical_record': medical_record, 'selection_form': selection_form,
+                               'submit_label': 'Update' if laboratory.id else 'Record',
+                               'laboratory': laboratory if laboratory.id else None,
+                               'laboratory_tests': selection_form.cleaned_data.get('laboratory_tests', [])})
 
         log_end_time()
         return response
@@ -251,8 +242,8 @@ class LaboratoryDetailView(DetailView):
 
     def get(self, request, *args, **kwargs):
         """
-        Retrieves laboratory test records from database. These tests will be used to fetch records for
-        patient's laboratory record. Tests will be used to group and order laboratory result records within a zip list.
+        Retrieves laboratory results of patient's laboratory record with a single query, grouped and ordered by
+        laboratory test within a zip list.
         :param request: HttpRequest
         :param args:    variable arguments
         :param kwargs:  named arguments
@@ -260,28 +251,11 @@ class LaboratoryDetailView(DetailView):
         """
 
         logger.info('Retrieving laboratory id from request URI')
-        test_list = []
-        laboratory_result_per_test_list = []
-        laboratory = self.model.objects.get(pk=kwargs.get('id'))
-        laboratory_tests = LaboratoryTest.objects.all().order_by('order')
-
-        for test in laboratory_tests:
-            logger.info('Retrieving laboratory test detail records for test [%s]' % test)
-            laboratory_results = []
-            test_list.append(test)
-            laboratory_test_details = LaboratoryTestDetail.objects.filter(laboratory_test=test).order_by('order')
-
-            for test_detail in laboratory_test_details:
-                logger.info('Retrieving laboratory results records for test detail [%s]' % test_detail)
-                result_set = LaboratoryResult.objects.filter(laboratory=laboratory,
-                                                             laboratory_test_detail=test_detail, is_deleted=False)
-                if result_set:
-                    for laboratory_result in result_set:
-                        laboratory_results.append(laboratory_result)
-
-            laboratory_result_per_test_list.append(laboratory_results)
-
-        test_results_zip = zip(test_list, laboratory_result_per_test_list)
+        laboratory = self.model.objects.select_related('medical_record__patient', 'recorded_by').get(
+            pk=kwargs.get('id'))
+
+        logger.info('Retrieving laboratory results grouped by laboratory test')
+        test_results_zip = load_laboratory_results_per_test(laboratory)
 
         return render(request, self.template_name,
                       {'laboratory': laboratory, 'test_results_zip': test_results_zip,
@@ -4,7 +4,6 @@ import logging
 # from third-party applications
 from django.contrib.auth.decorators import login_required
 from django.core.urlresolvers import reverse_lazy
-from django.forms import formset_factory
 from django.http import HttpResponseRedirect
 from django.shortcuts import render, redirect
 from django.utils.decorators import method_decorator
@@ -14,9 +13,11 @@ from django.views.generic import FormView, DetailView
 # from main application
 from opd_application.constants import DASHBOARD_PAGE_NAME, MEDICAL_HISTORY_FORM_TEMPLATE, LOGIN_PAGE_NAME, \
     MEDICAL_HISTORY_PROFILE_TEMPLATE, MEDICAL_HISTORY_EDIT_PAGE_NAME
+from opd_application.forms.general_forms import RegisteredFormSet
 from opd_application.forms.medical_history_forms import MedicalHistoryDetailForm
-from opd_application.models.medical_history_models import Patient, MedicalHistoryCategoryDetail, MedicalHistory, \
-    MedicalHistoryDetail, MedicalHistoryCategory
+from opd_application.loaders import load_latest_medical_history_details, load_medical_history_details_per_category
+from opd_application.models.medical_history_models import Patient, MedicalHistoryCategoryDetail, MedicalHistory
+from opd_application.reference_data import get_reference_records
 
 logger = logging.getLogger(__name__)
 
@@ -30,8 +31,7 @@ class MedicalHistoryFormView(FormView):
     form_class = MedicalHistoryDetailForm
     template_name = MEDICAL_HISTORY_FORM_TEMPLATE
 
-    model_items = MedicalHistoryCategoryDetail.objects.count()
-    MedicalHistoryFormSet = formset_factory(form_class, max_num=model_items)
+    MedicalHistoryFormSet = RegisteredFormSet(form_class, MedicalHistoryCategoryDetail)
 
     def get(self, request, *args, **kwargs):
         """
@@ -50,28 +50,19 @@ class MedicalHistoryFormView(FormView):
             logger.info('Retrieved patient ID value [%s]' % patient_id)
             initial = []
             patient = Patient.objects.get(pk=patient_id)
-            medical_history_category_details = MedicalHistoryCategoryDetail.objects.all()
-            patient_latest_medical_history = MedicalHistory.objects.filter(patient=patient).order_by('-id').first()
+            medical_history_category_details = get_reference_records(MedicalHistoryCategoryDetail)
+            latest_medical_history_details = load_latest_medical_history_details(patient)
 
             for category_detail in medical_history_category_details:
                 logger.info('Creating display labels for [%s]' % category_detail)
                 display = '%s: %s' % (str(category_detail.medical_history_category), category_detail.description)
-                medical_history_details = None
 
                 if category_detail.medical_history_category_unit.is_displayable:
                     display += ' (%s)' % category_detail.medical_history_category_unit
 
                 logger.info('Created display is [%s]' % display)
 
-                if patient_latest_medical_history:
-                    try:
-                        logger.info('Retrieving patient [%s] latest medical history record' % patient)
-                        medical_history_details = MedicalHistoryDetail.objects.get(
-                            medical_history=patient_latest_medical_history,
-                            medical_history_category_detail=category_detail)
-                        logger.info('Latest medical history record found')
-                    except MedicalHistoryDetail.DoesNotExist:
-                        logger.info('No recorded medical history found')
+                medical_history_details = latest_medical_history_details.get(category_detail.id)
 
                 initial.append({'medical_history_category_detail_display': display,
                                 'medical_history_category_detail': category_detail,
@@ -140,9 +131,8 @@ class MedicalHistoryDetailView(DetailView):
 
     def get(self, request, *args, **kwargs):
         """
-        Retrieves medical history category records from database. These categories will be used to fetch records for
-        patient's medical history record. Categories will be used to group and order medical history detail records in
-        within a zip list.
+        Retrieves medical history detail records of patient's medical history record with a single query, grouped and
+        ordered by medical history category within a zip list.
         :param request: HttpRequest
         :param args:    variable arguments
         :param kwargs:  named arguments
@@ -150,29 +140,10 @@ class MedicalHistoryDetailView(DetailView):
         """
 
         logger.info('Retrieving medical history id from request URI')
-        category_list = []
-        medical_history_details_per_category_list = []
-        medical_history = self.model.objects.get(pk=kwargs.get('id'))
-        medical_history_categories = MedicalHistoryCategory.objects.all().order_by('order')
-
-        for category in medical_history_categories:
-            logger.info('Retrieving medical history category detail records for category [%s]' % category)
-            medical_history_details = []
-            category_list.append(category)
-            medical_history_category_details = MedicalHistoryCategoryDetail.objects.filter(
-                medical_history_category=category).order_by('order')
+        medical_history = self.model.objects.select_related('patient', 'recorded_by').get(pk=kwargs.get('id'))
 
-            for category_detail in medical_history_category_details:
-                logger.info('Retrieving medical history detail records for category detail [%s]' % category_detail)
-                result_set = MedicalHistoryDetail.objects.filter(medical_history=medical_history,
-                                                                 medical_history_category_detail=category_detail)
-                if result_set:
-                    for medical_history_detail in result_set:
-                        medical_history_details.append(medical_history_detail)
-
-            medical_history_details_per_category_list.append(medical_history_details)
-
-        category_details_zip = zip(category_list, medical_history_details_per_category_list)
+        logger.info('Retrieving medical history details grouped by category')
+        category_details_zip = load_medical_history_details_per_category(medical_history)
 
         return render(request, self.template_name,
                       {'medical_history': medical_history, 'category_details_zip': category_details_zip,
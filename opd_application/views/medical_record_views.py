@@ -10,11 +10,8 @@ from django.views.generic import FormView, ListView, DetailView
 from opd_application.constants import *
 from opd_application.forms.medical_record_forms import MedicalRecordForm, MedicalRecordEditForm
 from opd_application.models.medical_record_models import MedicalRecord
-from opd_application.models.physical_exam_models import PhysicalExam
 from opd_application.models.models import Patient
-from opd_application.models.prescription_models import Prescription
-from opd_application.models.diagnosis_models import Diagnosis
-from opd_application.models.laboratory_models import Laboratory
+from opd_application.record_counts import save_medical_record
 from opd_application.views.general_views import GeneralSearchListView, GeneralListView
 
 logger = logging.getLogger(__name__)
@@ -59,17 +56,15 @@ class MedicalRecordDetailView(DetailView):
     template_name = MEDICAL_RECORD_PROFILE_TEMPLATE
 
     def get(self, request, *args, **kwargs):
-        medical_record = self.model.objects.get(pk=kwargs.get('id'))
+        medical_record = self.model.objects.select_related('patient', 'recorded_by').get(pk=kwargs.get('id'))
         edit_link = reverse_lazy('opd:edit_medical', kwargs={'id': medical_record.id})
-        physical_exam_count = PhysicalExam.objects.filter(medical_record=medical_record).count()
-        laboratory_count = Laboratory.objects.filter(medical_record=medical_record).count()
-        diagnosis_count = Diagnosis.objects.filter(medical_record=medical_record).count()
-        prescription_count = Prescription.objects.filter(medical_record=medical_record).count()
 
         return render(request, self.template_name,
                       {'medical_record': medical_record, 'complaints': medical_record.complaint.all(),
-                       'physical_exam_count': physical_exam_count, 'laboratory_count': laboratory_count,
-                       'diagnosis_count': diagnosis_count, 'prescription_count': prescription_count,
+                       'physical_exam_count': medical_record.physical_exam_count,
+                       'laboratory_count': medical_record.laboratory_count,
+                       'diagnosis_count': medical_record.diagnosis_count,
+                       'prescription_count': medical_record.prescription_count,
                        'edit_link': edit_link})
 
     @method_decorator(login_required(login_url=LOGIN_PAGE_NAME))
@@ -100,6 +95,10 @@ class MedicalRecordListView(GeneralListView):
 
 
 class MedicalRecordSearchListView(GeneralSearchListView):
+    projection_fields = ['id', 'recorded_date', 'recorded_by__username', 'patient__last_name', 'patient__first_name',
+                         'patient__middle_name']
+    projection_related = ['recorded_by', 'patient']
+
     def __init__(self, **kwargs):
         super(MedicalRecordSearchListView, self).__init__(MedicalRecord, MEDICAL_RECORD_PAGE_ICON,
                                                           'Medical Records',
@@ -127,7 +126,7 @@ class MedicalRecordEditFormView(FormView):
             record = form.save(commit=False)
             record.recorded_by = request.user
             record.recorded_date = localtime(now())
-            record.save()
+            save_medical_record(record)
             form.save_m2m()
 
             return redirect(record)
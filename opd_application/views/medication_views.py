@@ -13,10 +13,11 @@ from django.utils.timezone import localtime, now
 from django.views.generic import FormView, DetailView
 
 # from main application
+from opd_application.bulk_writes import bulk_create
 from opd_application.constants import DASHBOARD_PAGE_NAME, MEDICATION_FORM_TEMPLATE, LOGIN_PAGE_NAME, \
     MEDICATION_EDIT_PAGE_NAME, MEDICATION_PROFILE_TEMPLATE
 from opd_application.forms.medication_forms import MedicationForm
-from opd_application.messages import CANNOT_DELETE_ALL_FORMS, MINIMUM_REQUIRED_NUMBER_OF_FORMS
+from opd_application.messages import MINIMUM_REQUIRED_NUMBER_OF_FORMS
 from opd_application.models.medication_models import MedicationEntry, Medication
 from opd_application.models.patient_models import Patient
 from opd_application.functions import log_end_time, log_start_time, log_enter_atomic_trans, log_exit_atomic_trans
@@ -24,31 +25,11 @@ from opd_application.functions import log_end_time, log_start_time, log_enter_at
 logger = logging.getLogger(__name__)
 
 
-def extract_form_data(initial_formset):
-    """
-    Returns an array of initial data from formset argument
-    :param initial_formset: Dict of formset
-    :return:                Array of initial formset data
-    """
-    log_start_time()
-
-    initial = []
-
-    for form in initial_formset:
-        data = {}
-        for field in form.fields:
-            data[field] = form[field].value()
-        initial.append(data)
-
-    log_end_time()
-    return initial
-
-
 class MedicationFormView(FormView):
     """
     View for handling medication record creation. Uses GET function to initially fill the form with patient
-    details. POST function handles saving of medication record. Add and Remove capabilities are also added in the POST
-    function to update form number.
+    details. POST function handles saving of medication record. Forms are added to the formset by the browser from the
+    empty form of the formset, and removed by checking their delete field.
     """
 
     form_class = MedicationForm
@@ -77,7 +58,7 @@ class MedicationFormView(FormView):
             patient = Patient.objects.get(pk=int(patient_id))
 
             logger.info('Creating formset with 1 extra form')
-            MedicationFormSet = formset_factory(self.form_class)
+            MedicationFormSet = formset_factory(self.form_class, can_delete=True)
             formset = MedicationFormSet()
 
             response = render(request, self.template_name,
@@ -96,10 +77,11 @@ class MedicationFormView(FormView):
                                 'frequency': entry.frequency, 'designated_time': entry.designated_time})
 
             logger.info('Creating formset with no additional forms')
-            MedicationFormSet = formset_factory(self.form_class, extra=0)
+            MedicationFormSet = formset_factory(self.form_class, can_delete=True, extra=0)
             formset = MedicationFormSet(initial=initial)
             response = render(request, self.template_name,
-                              {'formset': formset, 'patient': medication.patient, 'submit_label': 'Record'})
+                              {'formset': formset, 'patient': medication.patient, 'medication': medication,
+                               'submit_label': 'Update'})
         else:
             logger.warn('Did not receive value for required medical parameter')
             response = redirect(DASHBOARD_PAGE_NAME, permanent=True)
@@ -137,44 +119,6 @@ class MedicationFormView(FormView):
         if 'cancel' in request.POST:
             logger.info('User clicked cancel - Redirecting to [%s]' % DASHBOARD_PAGE_NAME)
             response = HttpResponseRedirect(reverse_lazy(DASHBOARD_PAGE_NAME))
-        elif 'add' in request.POST:
-            logger.info('User clicked add - Creating formset with 1 extra form and delete functionality')
-            MedicationFormSet = formset_factory(self.form_class, can_delete=True, extra=1)
-            initial_formset = MedicationFormSet(request.POST)
-
-            logger.info('Retrieving form data from POST request for formset pre-fill')
-
-            formset = MedicationFormSet(initial=extract_form_data(initial_formset))
-            response = render(request, self.template_name,
-                              {'formset': formset, 'patient': patient, 'submit_label': submit_label})
-        elif 'delete' in request.POST:
-            logger.info('User clicked delete - Removing deleted forms from formset')
-            MedicationFormSet = formset_factory(self.form_class, can_delete=True, extra=0)
-            initial_formset = MedicationFormSet(request.POST)
-
-            if len(initial_formset.deleted_forms) >= len(initial_formset):
-                logger.warn('Number of deleted forms is equal to total number of forms')
-                error_message = CANNOT_DELETE_ALL_FORMS
-                formset = MedicationFormSet(initial=extract_form_data(initial_formset))
-            else:
-                logger.info('Removing deleted forms from initial formset')
-                initial = []
-                for form in initial_formset:
-                    data = {}
-                    for field in form.fields:
-                        data[field] = form[field].value()
-
-                    if not data['DELETE']:
-                        logger.info('Form is removed from formset')
-                        initial.append(data)
-                    else:
-                        logger.info('Form is included in formset')
-
-                formset = MedicationFormSet(initial=initial)
-
-            response = render(request, self.template_name,
-                              {'formset': formset, 'patient': patient, 'submit_label': submit_label,
-                               'error_message': error_message})
         else:
             logger.info('User clicked submit - Validating forms')
             MedicationFormSet = formset_factory(self.form_class, can_delete=True, extra=0)
@@ -183,30 +127,28 @@ class MedicationFormView(FormView):
             logger.info('Validating formset values')
             if formset.is_valid():
                 logger.info('Received valid formset data')
-                medication = Medication(patient=patient, recorded_by=request.user,
-                                        recorded_date=localtime(now()))
-                with atomic():
-                    log_enter_atomic_trans()
-                    for idx, form in enumerate(formset):
-                        if None in form.cleaned_data:
-                            pass
-                        else:
-                            break
+                medication_entries = [form.save(commit=False) for form in formset
+                                      if form.cleaned_data and form not in formset.deleted_forms]
+
+                if medication_entries:
+                    logger.info('Saving medication record with [%s] entries' % len(medication_entries))
+                    medication = Medication(patient=patient, recorded_by=request.user,
+                                            recorded_date=localtime(now()))
+                    with atomic():
+                        log_enter_atomic_trans()
                         medication.save()
-                        medication_entry = form.save(commit=False)
-                        medication_entry.medication = medication
-                        medication_entry.save()
-                log_exit_atomic_trans()
+                        for medication_entry in medication_entries:
+                            medication_entry.medication = medication
+                        bulk_create(medication_entries)
+                    log_exit_atomic_trans()
 
-                if medication.id:
                     logger.info('Redirecting to medication profile page')
                     response = redirect(medication)
                 else:
                     logger.info('Did not receive any valid form')
                     error_message = MINIMUM_REQUIRED_NUMBER_OF_FORMS
-                    MedicationFormSet = formset_factory(self.form_class)
                     response = render(request, self.template_name,
-                                      {'formset': MedicationFormSet(), 'patient': patient, 'submit_label': submit_label,
+                                      {'formset': formset, 'patient': patient, 'submit_label': submit_label,
                                        'error_message': error_message})
             else:
                 logger.warn('Received invalid formset data')
@@ -2,11 +2,11 @@ import urllib.parse
 
 from django.contrib.auth.decorators import login_required
 from django.core.urlresolvers import reverse_lazy
-from django.http import HttpResponseRedirect
+from django.http import HttpResponseRedirect, JsonResponse
 from django.shortcuts import render, redirect
 from django.utils.decorators import method_decorator
 from django.utils.timezone import localtime, now
-from django.views.generic import FormView, ListView, DetailView
+from django.views.generic import FormView, ListView, DetailView, View
 
 from opd_record_management import settings
 from opd_application.constants import *
@@ -15,6 +15,7 @@ from opd_application.messages import *
 from opd_application.models.patient_models import Patient
 from opd_application.models.medical_history_models import MedicalHistory
 from opd_application.models.medication_models import Medication
+from opd_application.search import suggest_patients
 from opd_application.views.general_views import GeneralSearchListView
 
 
@@ -47,12 +48,37 @@ class PatientFormView(FormView):
 
 
 class PatientSearchListView(GeneralSearchListView):
+    projection_fields = ['id', 'last_name', 'first_name', 'birth_date']
+    projection_related = []
+
     def __init__(self, **kwargs):
         super(PatientSearchListView, self).__init__(Patient, PATIENT_PAGE_ICON, 'Patients',
                                                     PATIENT_SEARCH_LIST_PAGE_NAME,
                                                     PATIENT_SEARCH_LIST_TEMPLATE, PATIENT_SEARCH_TYPE_LABEL, **kwargs)
 
 
+class PatientAutocompleteView(View):
+    """
+    View for suggesting patients while a name is typed in the dashboard search. Uses only GET function to return
+    matching patients as JSON.
+    """
+
+    def get(self, request, *args, **kwargs):
+        """
+        Retrieves patients whose last name or first name starts with the search parameter
+        :param request: HttpRequest
+        :param args:    variable arguments
+        :param kwargs:  named arguments
+        :return:        JsonResponse containing a list of patient ids, names and birth dates
+        """
+
+        return JsonResponse({'results': suggest_patients(request.GET.get('search_param'))})
+
+    @method_decorator(login_required(login_url=LOGIN_PAGE_NAME))
+    def dispatch(self, request, *args, **kwargs):
+        return super(PatientAutocompleteView, self).dispatch(request, *args, **kwargs)
+
+
 class PatientProfileDetailView(DetailView):
     model = Patient
     template_name = PATIENT_PROFILE_TEMPLATE
@@ -1,4 +1,3 @@
-import collections
 import logging
 
 from django.contrib.auth.decorators import login_required
@@ -8,13 +7,16 @@ from django.utils.decorators import method_decorator
 from django.utils.timezone import localtime, now
 from django.views.generic import FormView, ListView, DetailView
 
+from opd_application.bulk_writes import create_physical_exam_details
 from opd_application.constants import PHYSICAL_EXAM_FORM_PAGE_NAME, PHYSICAL_EXAM_FORM_TEMPLATE, DASHBOARD_PAGE_NAME, \
     PHYSICAL_EXAM_PROFILE_TEMPLATE, PHYSICAL_EXAM_LIST_PAGE_NAME, PHYSICAL_EXAM_PAGE_ICON, \
     PHYSICAL_EXAM_PROFILE_PAGE_NAME, PHYSICAL_EXAM_LIST_TEMPLATE, PHYSICAL_EXAM_SEARCH_LIST_PAGE_NAME, \
     PHYSICAL_EXAM_SEARCH_LIST_TEMPLATE, LOGIN_PAGE_NAME, GENERAL_SEARCH_TYPE_LABEL, PRESCRIPTION_LIST_PAGE_NAME, \
     PRESCRIPTION_PAGE_ICON, LABORATORY_PAGE_ICON, LABORATORY_LIST_PAGE_NAME
 from opd_application.forms.physical_exam_forms import PhysicalExamForm
+from opd_application.loaders import load_entries_per_key, load_adjacent_record_ids
 from opd_application.models.physical_exam_models import PhysicalExam, MedicalRecord, PhysicalExamKey, PhysicalExamDetail
+from opd_application.reference_data import get_reference_records
 from opd_application.views.general_views import GeneralSearchListView, modify_page_links, \
     validate_response, GeneralListView
 
@@ -42,35 +44,7 @@ class PhysicalExamFormView(FormView):
             physical_exam = PhysicalExam(medical_record=medical_record, recorded_by=request.user,
                                          recorded_date=localtime(now()))
             physical_exam.save()
-            for field in form.fields:
-                # Retrieve Physical Exam Keys (Limit Result)
-                key = list(PhysicalExamKey.objects.filter(key_value__iexact=field)[:1])
-                if key:
-                    # Check if there is available data for current Physical Exam Key
-                    if form.cleaned_data[field]:
-                        values = form.cleaned_data[field]
-                        # Check if value is Iterable and not String before saving
-                        if isinstance(values, collections.Iterable) and not isinstance(values, str):
-                            for value in values:
-                                if isinstance(value, str):
-                                    real_value = value
-                                else:
-                                    real_value = value.id
-                                physical_exam_detail = PhysicalExamDetail(physical_exam=physical_exam, key=key[0],
-                                                                          real_value=real_value, str_value=value)
-                                physical_exam_detail.save()
-                        elif not isinstance(values, str) and not isinstance(values, bool):
-                            physical_exam_detail = PhysicalExamDetail(physical_exam=physical_exam, key=key[0],
-                                                                      real_value=values.id, str_value=values)
-                            physical_exam_detail.save()
-                        else:
-                            physical_exam_detail = PhysicalExamDetail(physical_exam=physical_exam, key=key[0],
-                                                                      real_value=values, str_value=values)
-                            physical_exam_detail.save()
-                    else:
-                        pass
-                else:
-                    pass
+            create_physical_exam_details(physical_exam, form)
 
             return redirect(physical_exam)
         else:
@@ -88,34 +62,22 @@ class PhysicalExamDetailView(DetailView):
     template_name = PHYSICAL_EXAM_PROFILE_TEMPLATE
 
     def get(self, request, *args, **kwargs):
-        physical_exam = self.model.objects.get(pk=kwargs.get('id'))
-        next_exam_record = self.model.objects.filter(medical_record=physical_exam.medical_record,
-                                                     id__gt=physical_exam.id).order_by('id').first()
-        prev_exam_record = self.model.objects.filter(medical_record=physical_exam.medical_record,
-                                                     id__lt=physical_exam.id).order_by('-id').first()
-
-        keys = list(PhysicalExamKey.objects.all().order_by('id'))
-        key_list = []
-        detail_list = []
+        physical_exam = self.model.objects.select_related('medical_record__patient', 'recorded_by').get(
+            pk=kwargs.get('id'))
+        prev_exam_id, next_exam_id = load_adjacent_record_ids(physical_exam, 'medical_record')
         link_dict = {}
 
-        if next_exam_record is not None:
+        if next_exam_id is not None:
             link_dict.update(
-                {'next_link': reverse_lazy(PHYSICAL_EXAM_PROFILE_PAGE_NAME, kwargs={'id': str(next_exam_record.id)})})
-        if prev_exam_record is not None:
+                {'next_link': reverse_lazy(PHYSICAL_EXAM_PROFILE_PAGE_NAME, kwargs={'id': str(next_exam_id)})})
+        if prev_exam_id is not None:
             link_dict.update(
-                {'prev_link': reverse_lazy(PHYSICAL_EXAM_PROFILE_PAGE_NAME, kwargs={'id': str(prev_exam_record.id)})})
+                {'prev_link': reverse_lazy(PHYSICAL_EXAM_PROFILE_PAGE_NAME, kwargs={'id': str(prev_exam_id)})})
 
-        for key in keys:
-            key_list.append(key.display_value)
-            value_list = []
-            values = list(
-                PhysicalExamDetail.objects.filter(physical_exam=physical_exam, key=key))
-            for value in values:
-                value_list.append(value.str_value)
-            detail_list.append(value_list)
-
-        key_detail_zip = zip(key_list, detail_list)
+        key_details = load_entries_per_key(PhysicalExamDetail.objects.filter(physical_exam=physical_exam), 'key',
+                                           get_reference_records(PhysicalExamKey))
+        key_detail_zip = [(key.display_value, [detail.str_value for detail in details])
+                          for key, details in key_details]
 
         return render(request, self.template_name,
                       {'physical_exam': physical_exam, 'patient': physical_exam.medical_record.patient,
@@ -163,24 +125,18 @@ class PhysicalExamEditFormView(FormView):
 
     def get(self, request, *args, **kwargs):
         physical_exam = PhysicalExam.objects.get(pk=kwargs.get('id'))
-        physical_exam_details = PhysicalExamDetail.objects.filter(physical_exam=physical_exam)
-
-        print(physical_exam_details)
         initial = {}
 
-        physical_exam_keys = PhysicalExamKey.objects.all()
-        for key in physical_exam_keys:
-            physical_exam_details = PhysicalExamDetail.objects.filter(physical_exam=physical_exam, key=key)
-            if physical_exam_details.count() > 1:
-                value_list = []
-                for detail in physical_exam_details:
-                    value_list.append(detail.real_value)
-                initial.update({key.key_value: value_list})
+        for key, physical_exam_details in load_entries_per_key(
+                PhysicalExamDetail.objects.filter(physical_exam=physical_exam), 'key',
+                get_reference_records(PhysicalExamKey)):
+            if not physical_exam_details:
+                continue
+            elif len(physical_exam_details) > 1:
+                initial.update({key.key_value: [detail.real_value for detail in physical_exam_details]})
             else:
                 initial.update({key.key_value: physical_exam_details[0].real_value})
-        initial.update({'medical_record': physical_exam.medical_record.id})
-
-        print(initial)
+        initial.update({'medical_record': physical_exam.medical_record_id})
 
         form = self.form_class(initial=initial)
 
@@ -194,25 +150,7 @@ class PhysicalExamEditFormView(FormView):
             physical_exam = PhysicalExam(medical_record=medical_record, recorded_by=request.user,
                                          recorded_date=localtime(now()))
             physical_exam.save()
-            for field in form.fields:
-                # Retrieve Physical Exam Keys (Limit Result)
-                key = list(PhysicalExamKey.objects.filter(key_value__iexact=field)[:1])
-                if key:
-                    # Check if there is available data for current Physical Exam Key
-                    if form.cleaned_data[field]:
-                        values = form.cleaned_data[field]
-                        physical_exam_detail = PhysicalExamDetail(physical_exam=physical_exam, key=key[0])
-                        # Check if value is Iterable and not String before saving
-                        if isinstance(values, collections.Iterable) and not isinstance(values, str):
-                            for value in values:
-                                physical_exam_detail.value = value.id
-                        else:
-                            physical_exam_detail.value = values
-                        physical_exam_detail.save()
-                    else:
-                        pass
-                else:
-                    pass
+            create_physical_exam_details(physical_exam, form)
 
             return redirect(physical_exam)
         else:
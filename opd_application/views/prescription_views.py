@@ -6,22 +6,26 @@ from django.db.transaction import atomic
 from django.contrib.auth.decorators import login_required
 from django.core.urlresolvers import reverse_lazy
 from django.forms import formset_factory
-from django.http import HttpResponseRedirect
+from django.http import HttpResponseRedirect, JsonResponse
 from django.shortcuts import render, redirect
 from django.utils.decorators import method_decorator
 from django.utils.timezone import localtime, now
-from django.views.generic import FormView, DetailView
+from django.views.generic import FormView, DetailView, View
 
 # from main application
+from opd_application.bulk_writes import PrescriptionEntryWriter
 from opd_application.constants import DASHBOARD_PAGE_NAME, PRESCRIPTION_FORM_TEMPLATE, LOGIN_PAGE_NAME, \
     PRESCRIPTION_PROFILE_TEMPLATE, PRESCRIPTION_EDIT_PAGE_NAME, PRESCRIPTION_LIST_TEMPLATE, DIAGNOSIS_FORM_PAGE_NAME, \
     DIAGNOSIS_PAGE_ICON, PHYSICAL_EXAM_LIST_PAGE_NAME, PRESCRIPTION_LIST_PAGE_NAME, PHYSICAL_EXAM_PAGE_ICON, \
     PRESCRIPTION_PAGE_ICON, DIAGNOSIS_LIST_PAGE_NAME, GENERAL_SEARCH_TYPE_LABEL, PRESCRIPTION_SEARCH_PAGE_NAME, \
-    PRESCRIPTION_SEARCH_LIST_TEMPLATE
-from opd_application.forms.prescription_forms import PrescriptionEntryForm
+    PRESCRIPTION_SEARCH_LIST_TEMPLATE, MEDICINE_AUTOCOMPLETE_PAGE_NAME
+from opd_application.forms.prescription_forms import PrescriptionEntryForm, BasePrescriptionEntryFormSet
 from opd_application.models.prescription_models import Medicine, Prescription, PrescriptionEntry
 from opd_application.models.medical_record_models import MedicalRecord
 from opd_application.functions import log_end_time, log_start_time, log_enter_atomic_trans, log_exit_atomic_trans
+from opd_application.messages import MINIMUM_REQUIRED_NUMBER_OF_FORMS
+from opd_application.reference_data import get_reference_record
+from opd_application.search import suggest_medicines
 from opd_application.views.general_views import GeneralListView, GeneralSearchListView
 
 logger = logging.getLogger(__name__)
@@ -36,13 +40,13 @@ class PrescriptionFormView(FormView):
     form_class = PrescriptionEntryForm
     template_name = PRESCRIPTION_FORM_TEMPLATE
 
-    medicine_count = Medicine.objects.count()
-    PrescriptionFormSet = formset_factory(form_class, max_num=medicine_count)
+    PrescriptionFormSet = formset_factory(form_class, formset=BasePrescriptionEntryFormSet, extra=0)
 
     def get(self, request, *args, **kwargs):
         """
-        Retrieves medicine records from database then creates a formset depending on the number of retrieved rows. Pre-
-        fills patient field using relationship between retrieved value of [medical] argument from URI
+        Creates a formset holding only the medicines of a prescription record, medicines are picked through the
+        medicine search. Pre-fills patient field using relationship between retrieved value of [medical] argument from
+        URI
         :param request: HttpRequest
         :param args:    variable arguments
         :param kwargs:  named arguments
@@ -51,11 +55,6 @@ class PrescriptionFormView(FormView):
 
         log_start_time()
 
-        initial = []
-
-        logger.info('Retrieving medicine records for form creation')
-        medicines = Medicine.objects.all()
-
         logger.info('Retrieving medical record ID from request URI')
         medical_record_id = request.GET.get('medical')
 
@@ -66,52 +65,37 @@ class PrescriptionFormView(FormView):
             logger.info('Retrieved medical record ID value [%s]' % medical_record_id)
             medical_record = MedicalRecord.objects.get(pk=medical_record_id)
 
-            logger.info('Creating initial medicine and medicine_label for each form in formset')
-            for medicine in medicines:
-                initial.append({'medicine': medicine, 'medicine_label': medicine})
-
-            formset = self.PrescriptionFormSet(initial=initial)
+            logger.info('Creating formset without forms')
+            formset = self.PrescriptionFormSet()
 
             response = render(request, self.template_name,
-                              {'formset': formset, 'medical_record': medical_record, 'submit_label': 'Record'})
+                              {'formset': formset, 'medical_record': medical_record, 'submit_label': 'Record',
+                               'autocomplete_link': reverse_lazy(MEDICINE_AUTOCOMPLETE_PAGE_NAME)})
         elif prescription_id:
             logger.info('Retrieved prescription record ID value [%s]' % prescription_id)
-            prescription = Prescription.objects.get(pk=prescription_id)
-
-            logger.info('Creating')
-            for medicine in medicines:
-                prescription_entry = PrescriptionEntry.objects.filter(prescription=prescription, medicine=medicine,
-                                                                      is_deleted=False)
-
-                if prescription_entry.count() > 1:
-                    logger.warn('Prescription entry count is greater than expected for medicine [%s]' % medicine)
-                    logger.info('Defaulting to first retrieved item')
-                    initial.append({'medicine': prescription_entry.first().medicine,
-                                    'medicine_label': prescription_entry.first().medicine,
-                                    'dosage': prescription_entry.first().dosage,
-                                    'package': prescription_entry.first().package,
-                                    'frequency': prescription_entry.first().frequency,
-                                    'designated_time': prescription_entry.first().designated_time,
-                                    'prescribe': True, })
-                elif prescription_entry.count() < 1:
-                    logger.info('No related prescription entry for medicine [%s]' % medicine)
-                    initial.append({'medicine': medicine,
-                                    'medicine_label': medicine, })
-                else:
-                    logger.info('Successful prescription entry retrieval for medicine [%s]' % medicine)
-                    initial.append({'medicine': prescription_entry.last().medicine,
-                                    'medicine_label': prescription_entry.last().medicine,
-                                    'dosage': prescription_entry.last().dosage,
-                                    'package': prescription_entry.last().package,
-                                    'frequency': prescription_entry.last().frequency,
-                                    'designated_time': prescription_entry.last().designated_time,
-                                    'prescribe': True, })
-
+            prescription = Prescription.objects.select_related('medical_record__patient').get(pk=prescription_id)
+
+            logger.info('Creating a form for each prescribed medicine')
+            prescription_entries = PrescriptionEntryWriter().get_current_entries(prescription)
+            initial = []
+
+            for medicine_id, prescription_entry in prescription_entries.items():
+                medicine = get_reference_record(Medicine, medicine_id)
+                initial.append({'medicine': medicine,
+                                'medicine_label': medicine,
+                                'dosage': prescription_entry.dosage_id,
+                                'package': prescription_entry.package_id,
+                                'frequency': prescription_entry.frequency_id,
+                                'designated_time': prescription_entry.designated_time_id,
+                                'prescribe': True, })
+
+            initial.sort(key=lambda data: (data['medicine'].order, data['medicine'].description))
             formset = self.PrescriptionFormSet(initial=initial)
 
             response = render(request, self.template_name,
                               {'formset': formset, 'medical_record': prescription.medical_record,
-                               'submit_label': 'Update', 'prescription': prescription})
+                               'submit_label': 'Update', 'prescription': prescription,
+                               'autocomplete_link': reverse_lazy(MEDICINE_AUTOCOMPLETE_PAGE_NAME)})
         else:
             logger.warn('Did not receive value for required medical parameter')
             response = redirect(DASHBOARD_PAGE_NAME, permanent=True)
@@ -142,74 +126,39 @@ class PrescriptionFormView(FormView):
         prescription_id = request.POST.get('prescription')
         medical_record = MedicalRecord.objects.get(pk=int(request.POST.get('medical_record')))
 
+        if prescription_id:
+            logger.info('Retrieved prescription record as foreign key for prescription entry records')
+            prescription = Prescription.objects.get(pk=prescription_id)
+        else:
+            logger.info('Created prescription record as foreign key for prescription entry records')
+            prescription = Prescription(medical_record=medical_record, recorded_by=request.user,
+                                        recorded_date=localtime(now()))
+
         logger.info('Validating formset values')
         if formset.is_valid():
             logger.info('Received valid formset data')
 
-            if prescription_id:
-                logger.info('Retrieved prescription record as foreign key for prescription entry records')
-                prescription = Prescription.objects.get(pk=prescription_id)
-            else:
-                logger.info('Created prescription record as foreign key for prescription entry records')
-                prescription = Prescription(medical_record=medical_record, recorded_by=request.user,
-                                            recorded_date=localtime(now()))
-
             with atomic():
                 log_enter_atomic_trans()
-                for idx, form in enumerate(formset):
-                    data = form.cleaned_data
-                    if prescription_id:
-                        logger.info(
-                            'Retrieving latest prescription entry for prescription record [%s] and medicine [%s]' % (
-                                prescription_id, form.instance.medicine))
-                        prescription_entry = PrescriptionEntry.objects.filter(prescription=prescription,
-                                                                              medicine=form.instance.medicine,
-                                                                              is_deleted=False).order_by(
-                            '-id').first()
-                    else:
-                        logger.info(
-                            'Creating latest prescription entry for prescription record [%s] and medicine category [%s]' % (
-                                prescription_id, form.instance.medicine))
-                        prescription_entry = form.save(commit=False)
-
-                    if prescription_entry:
-                        if prescription_id and data['prescribe']:
-                            logger.info('Updating details of prescription entry')
-                            prescription_entry.dosage = form.instance.dosage
-                            prescription_entry.package = form.instance.package
-                            prescription_entry.frequency = form.instance.frequency
-                            prescription_entry.designated_time = form.instance.designated_time
-                        elif prescription_id and not data['prescribe']:
-                            logger.info('Removing details of prescription entry')
-                            prescription_entry.is_deleted = True
-                        elif data['prescribe']:
-                            logger.info('Saving details of new prescription entry')
-                            prescription.save()
-                            prescription_entry.prescription = prescription
-                        else:
-                            logger.info('Skipping prescription entry for [%s]' % form.instance.medicine)
-                            continue
-                    else:
-                        logger.warn('No value for prescription_entry variable. Using value from form')
-                        if data['prescribe']:
-                            prescription.save()
-                            prescription_entry = form.save(commit=False)
-                            prescription_entry.prescription = prescription
-                        else:
-                            logger.info('Skipping prescription entry for [%s]' % form.instance.medicine)
-                            continue
-
-                    prescription_entry.updated_by = request.user
-                    prescription_entry.updated_date = localtime(now())
-                    prescription_entry.save()
-
+                PrescriptionEntryWriter().save(prescription, formset, request.user)
             log_exit_atomic_trans()
 
-            logger.info('Redirecting to prescription profile page')
-            response = redirect(prescription)
+            if prescription.id:
+                logger.info('Redirecting to prescription profile page')
+                response = redirect(prescription)
+            else:
+                logger.info('Did not receive any valid form')
+                response = render(request, self.template_name,
+                                  {'formset': formset, 'medical_record': medical_record, 'submit_label': 'Record',
+                                   'prescription': None, 'error_message': MINIMUM_REQUIRED_NUMBER_OF_FORMS,
+                                   'autocomplete_link': reverse_lazy(MEDICINE_AUTOCOMPLETE_PAGE_NAME)})
         else:
             logger.warn('Received invalid formset data')
-            response = render(request, self.template_name, {'formset': formset, 'medical_record': medical_record})
+            response = render(request, self.template_name,
+                              {'formset': formset, 'medical_record': medical_record,
+                               'submit_label': 'Update' if prescription.id else 'Record',
+                               'prescription': prescription if prescription.id else None,
+                               'autocomplete_link': reverse_lazy(MEDICINE_AUTOCOMPLETE_PAGE_NAME)})
 
         log_end_time()
         return response
@@ -219,6 +168,28 @@ class PrescriptionFormView(FormView):
         return super(PrescriptionFormView, self).dispatch(request, *args, **kwargs)
 
 
+class MedicineAutocompleteView(View):
+    """
+    View for suggesting medicines while a medicine name is typed in the prescription form. Uses only GET function to
+    return matching medicines as JSON.
+    """
+
+    def get(self, request, *args, **kwargs):
+        """
+        Retrieves medicines having a word starting with every word of the search parameter
+        :param request: HttpRequest
+        :param args:    variable arguments
+        :param kwargs:  named arguments
+        :return:        JsonResponse containing a list of medicine ids and descriptions
+        """
+
+        return JsonResponse({'results': suggest_medicines(request.GET.get('search_param'))})
+
+    @method_decorator(login_required(login_url=LOGIN_PAGE_NAME))
+    def dispatch(self, request, *args, **kwargs):
+        return super(MedicineAutocompleteView, self).dispatch(request, *args, **kwargs)
+
+
 class PrescriptionDetailView(DetailView):
     """
     View for displaying patient's prescription record information for a specific medical record. Uses only GET function
@@ -0,0 +1,90 @@
+# from python library
+import logging
+
+# from third-party applications
+from django.contrib.auth.decorators import login_required
+from django.core.urlresolvers import reverse_lazy
+from django.shortcuts import render, redirect
+from django.utils.decorators import method_decorator
+from django.views.generic import View
+
+# from main application
+from opd_application.constants import DASHBOARD_PAGE_NAME, LOGIN_PAGE_NAME, GENERAL_SEARCH_TYPE_LABEL, \
+    UNIFIED_SEARCH_PAGE_ICON, UNIFIED_SEARCH_PAGE_NAME, UNIFIED_SEARCH_TEMPLATE
+from opd_application.date_search import InvalidDateSearch
+from opd_application.functions import log_start_time, log_end_time
+from opd_application.messages import EMPTY_SEARCH_RESULT, INVALID_SEARCH_TYPE, INVALID_SEARCH_PARAMETER_VALUE
+from opd_application.search import find_search_documents
+from opd_application.views.general_views import initialise_form
+
+logger = logging.getLogger(__name__)
+
+
+class UnifiedSearchView(View):
+    """
+    View for searching patients and all record types at once. Results are grouped by record type. Uses POST function
+    for searches made from the dashboard and GET function for searches made from the results page.
+    """
+
+    template_name = UNIFIED_SEARCH_TEMPLATE
+    page_title = 'All Records'
+    page_icon = UNIFIED_SEARCH_PAGE_ICON
+    search_link = reverse_lazy(UNIFIED_SEARCH_PAGE_NAME)
+    search_labels = GENERAL_SEARCH_TYPE_LABEL
+
+    def process_search(self, request):
+        """
+        Receives either POST or GET request then searches search documents depending on search query
+        :param request: HttpRequest instance
+        :return:        HttpResponse instance
+        """
+
+        log_start_time()
+
+        form = initialise_form(self, request)
+
+        if form is None or not form.is_valid():
+            logger.warn('Did not receive a valid form')
+            log_end_time()
+            return redirect(DASHBOARD_PAGE_NAME, permanent=True)
+
+        search_type = form.cleaned_data['search_type']
+        search_param = form.cleaned_data['search_param']
+        groups = []
+        error_message = None
+
+        try:
+            groups = find_search_documents(search_type, search_param)
+        except KeyError:
+            logger.warn('Received invalid search type [%s]' % search_type)
+            error_message = INVALID_SEARCH_TYPE
+        except InvalidDateSearch:
+            logger.warn('Received search parameter that is not a date')
+            error_message = INVALID_SEARCH_PARAMETER_VALUE
+
+        if not groups and not error_message:
+            logger.info('Search returned an empty list')
+            error_message = EMPTY_SEARCH_RESULT
+
+        log_end_time()
+        return render(request, self.template_name,
+                      {'form': form,
+                       'groups': groups,
+                       'search_type_labels': self.search_labels,
+                       'act_search_type_label': self.search_labels.get(search_type),
+                       'page_title': self.page_title,
+                       'page_icon': self.page_icon,
+                       'error_message': error_message,
+                       })
+
+    def get(self, request, *args, **kwargs):
+        logger.info('Processing GET request')
+        return self.process_search(request)
+
+    def post(self, request, *args, **kwargs):
+        logger.info('Processing POST request')
+        return self.process_search(request)
+
+    @method_decorator(login_required(login_url=LOGIN_PAGE_NAME))
+    def dispatch(self, request, *args, **kwargs):
+        return super(UnifiedSearchView, self).dispatch(request, *args, **kwargs)
@@ -130,6 +130,12 @@ CRISPY_TEMPLATE_PACK = 'bootstrap3'
 PHONENUMBER_DB_FORMAT = 'E164'
 PHONENUMBER_DEFAULT_REGION = 'PH'
 
+# Search backend used for patient name searches, one of:
+#   opd_application.search_backends.OrmSearchBackend             (any database)
+#   opd_application.search_backends.MySQLFullTextSearchBackend   (MySQL 5.6+)
+#   opd_application.search_backends.SQLiteFTS5SearchBackend      (SQLite with FTS5)
+OPD_SEARCH_BACKEND = 'opd_application.search_backends.OrmSearchBackend'
+
 # Logging Settings
 LOGGING = {
     # Logging Schema Version (current value is limited to 1)
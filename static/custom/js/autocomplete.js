@@ -0,0 +1,110 @@
+/*
+* Shows patient name suggestions below a search input while the user types. Suggestions are requested after
+* the user stops typing for a short while and link to the profile of the suggested patient.
+*
+* @param {string} input_id - id of search input node
+* @param {string} source_link - link of patient autocomplete endpoint
+* @param {string} profile_link - link of any patient profile, its id is replaced by the suggested patient id
+* @return None
+*/
+function patient_autocomplete(input_id, source_link, profile_link) {
+    var input = $('#' + input_id);
+    var suggestion_list = $('<ul class="dropdown-menu"></ul>');
+    var delay_timer = null;
+    var last_request = null;
+
+    input.attr('autocomplete', 'off');
+    input.parent().css('position', 'relative').append(suggestion_list);
+
+    input.on('input', function () {
+        clearTimeout(delay_timer);
+
+        delay_timer = setTimeout(function () {
+            if (last_request != null) last_request.abort();
+
+            last_request = $.getJSON(source_link, {'search_param': input.val()}, function (data) {
+                suggestion_list.empty();
+
+                $.each(data.results, function (i, patient) {
+                    var link = $('<a></a>').attr('href', profile_link.replace(/\/[0-9]+\/$/, '/' + patient.id + '/'));
+                    link.text(patient.name + ' (' + patient.birth_date + ')');
+                    suggestion_list.append($('<li></li>').append(link));
+                });
+
+                suggestion_list.toggle(data.results.length > 0);
+            });
+        }, 150);
+    });
+
+    input.on('blur', function () {
+        setTimeout(function () {
+            suggestion_list.hide();
+        }, 200);
+    });
+}
+
+/*
+* Shows medicine suggestions below a search input while the user types. Choosing a suggestion adds a prescription
+* entry form for the medicine to the formset, a medicine already in the formset is not added again.
+*
+* @param {string} input_id - id of search input node
+* @param {string} source_link - link of medicine autocomplete endpoint
+* @param {string} prefix - formset prefix
+* @param {string} container_id - id of node holding the forms of the formset
+* @param {string} template_id - id of node holding the rendered empty form
+* @return None
+*/
+function medicine_autocomplete(input_id, source_link, prefix, container_id, template_id) {
+    var input = $('#' + input_id);
+    var suggestion_list = $('<ul class="dropdown-menu"></ul>');
+    var delay_timer = null;
+    var last_request = null;
+
+    input.attr('autocomplete', 'off');
+    input.parent().css('position', 'relative').append(suggestion_list);
+
+    input.on('input', function () {
+        clearTimeout(delay_timer);
+
+        delay_timer = setTimeout(function () {
+            if (last_request != null) last_request.abort();
+
+            last_request = $.getJSON(source_link, {'search_param': input.val()}, function (data) {
+                suggestion_list.empty();
+
+                $.each(data.results, function (i, medicine) {
+                    var link = $('<a href="#"></a>').text(medicine.description);
+
+                    link.on('mousedown', function (event) {
+                        event.preventDefault();
+                        suggestion_list.hide();
+                        input.val('');
+
+                        var picked = $('#' + container_id + ' input[name$="-medicine"]').filter(function () {
+                            return this.value == medicine.id;
+                        });
+                        if (picked.length) return;
+
+                        var form_index = add_formset_form(prefix, container_id, template_id);
+                        if (form_index < 0) return;
+
+                        var form_prefix = prefix + '-' + form_index + '-';
+                        $('[name="' + form_prefix + 'medicine"]').val(medicine.id);
+                        $('[name="' + form_prefix + 'medicine_label"]').val(medicine.description);
+                        $('[name="' + form_prefix + 'prescribe"]').prop('checked', true);
+                    });
+
+                    suggestion_list.append($('<li></li>').append(link));
+                });
+
+                suggestion_list.toggle(data.results.length > 0);
+            });
+        }, 150);
+    });
+
+    input.on('blur', function () {
+        setTimeout(function () {
+            suggestion_list.hide();
+        }, 200);
+    });
+}
@@ -0,0 +1,21 @@
+/*
+* Adds a form to a formset by copying its empty form, without reloading the page. The [__prefix__] placeholder of the
+* empty form is replaced by the next form index and the TOTAL_FORMS field of the management form is updated.
+*
+* @param {string} prefix - formset prefix
+* @param {string} container_id - id of node holding the forms of the formset
+* @param {string} template_id - id of node holding the rendered empty form
+* @return {number} index of added form, -1 if the formset already has its maximum number of forms
+*/
+function add_formset_form(prefix, container_id, template_id) {
+    var total_forms = $('#id_' + prefix + '-TOTAL_FORMS');
+    var max_forms = parseInt($('#id_' + prefix + '-MAX_NUM_FORMS').val());
+    var form_index = parseInt(total_forms.val());
+
+    if (form_index >= max_forms) return -1;
+
+    $('#' + container_id).append($('#' + template_id).html().replace(/__prefix__/g, form_index));
+    total_forms.val(form_index + 1);
+
+    return form_index;
+}